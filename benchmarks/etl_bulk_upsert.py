@@ -0,0 +1,64 @@
+"""
+Compare the per-row update_or_create path of VikingsShowService and
+NorsemenShowService with their bulk upsert mode.
+
+    python -m benchmarks.etl_bulk_upsert --records 10000
+
+Each mode loads a raw snapshot of synthetic characters into empty tables, then
+loads it again so every row takes the update branch. Runs in a throwaway test
+database.
+"""
+
+import argparse
+
+from benchmarks.utils import measure_queries, setup_django, test_database
+
+
+def synthetic_vikings_show(records):
+    return [
+        {
+            "href": f"/shows/vikings/cast/character-{index}",
+            "img_src": f"https://www.history.com/images/character-{index}.jpg",
+            "character_name": f"Character {index}",
+            "actor_name": f"Actor {index}",
+            "character_description": f"Description of character {index}. " * 10,
+        }
+        for index in range(records)
+    ]
+
+
+def synthetic_norsemen_show(records):
+    return [
+        {
+            "character_name": f"Character {index}",
+            "actor_name": f"Actor {index}",
+            "description": f"Description of character {index}.",
+        }
+        for index in range(records)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    args = parser.parse_args()
+
+    setup_django()
+    from etl.models import NorsemenShow, RawNorsemenShow, RawVikingsShow, VikingsShow
+    from etl.services import NorsemenShowService, VikingsShowService
+
+    with test_database():
+        RawVikingsShow.objects.create(data=synthetic_vikings_show(args.records))
+        RawNorsemenShow.objects.create(data=synthetic_norsemen_show(args.records))
+
+        for service, model in [(VikingsShowService(), VikingsShow), (NorsemenShowService(), NorsemenShow)]:
+            for bulk in (False, True):
+                model.objects.all().delete()
+                mode = "bulk" if bulk else "per-row"
+                for run in ("insert", "update"):
+                    with measure_queries(f"{model.__name__} {mode} {run}"):
+                        service.handle(full_rebuild=True, bulk=bulk)
+
+
+if __name__ == "__main__":
+    main()
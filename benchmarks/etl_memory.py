@@ -0,0 +1,74 @@
+"""
+Measure peak Python memory (tracemalloc) of the ETL over a long raw history.
+
+    python -m benchmarks.etl_memory --snapshots 300 --characters 60 --description-kb 8
+
+Compares walking the raw snapshots through a cached queryset, as the ETL
+services used to, with the streamed `iter_records` pipeline, then runs a full
+VikingsShowService rebuild. Runs in a throwaway test database.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.utils import setup_django, test_database
+
+
+def synthetic_snapshot(characters, description_kb, revision):
+    return [
+        {
+            "href": f"/shows/vikings/cast/character-{index}",
+            "img_src": f"https://www.history.com/images/character-{index}.jpg",
+            "character_name": f"Character {index}",
+            "actor_name": f"Actor {index}",
+            "character_description": f"Revision {revision}. " + "x" * (description_kb * 1024),
+        }
+        for index in range(characters)
+    ]
+
+
+def measure_peak(label, run):
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} peak={peak / 2**20:8.1f} MiB  wall_time={elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshots", type=int, default=300)
+    parser.add_argument("--characters", type=int, default=60)
+    parser.add_argument("--description-kb", type=int, default=8)
+    args = parser.parse_args()
+
+    setup_django()
+    from etl.models import RawVikingsShow
+    from etl.services import VikingsShowService
+
+    with test_database():
+        for revision in range(args.snapshots):
+            RawVikingsShow.objects.create(data=synthetic_snapshot(args.characters, args.description_kb, revision))
+        service = VikingsShowService()
+        raw_shows = RawVikingsShow.objects.order_by("created_at")
+
+        def cached_queryset():
+            queryset = raw_shows.all()
+            for raw_show in queryset:
+                for record in raw_show.data:
+                    record.get("character_name")
+
+        def streamed_records():
+            for record in service.iter_records(raw_shows.all()):
+                record.get("character_name")
+
+        measure_peak("cached queryset", cached_queryset)
+        measure_peak("streamed iter_records", streamed_records)
+        measure_peak("VikingsShowService rebuild", lambda: service.handle(full_rebuild=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Fixture pages for the parser benchmarks.
+
+`load_fixture` reads `benchmarks/fixtures/<name>.html` when it has been saved
+with `python -m benchmarks.fixtures` (which needs network access to the scraped
+sites), and otherwise builds a synthetic page with the same structure the
+parsers look for, padded with the navigation, scripts and footer markup that
+make up most of the real pages.
+"""
+
+from pathlib import Path
+
+import requests
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+FIXTURE_URLS = {
+    "vikings_cast": "https://www.history.com/shows/vikings/cast",
+    "vikings_character": "https://www.history.com/shows/vikings/cast/ragnar-lothbrok",
+    "norsemen": "https://en.wikipedia.org/wiki/Norsemen_(TV_series)",
+    "nfl_roster": "https://www.vikings.com/team/players-roster/",
+    "nfl_player": "https://www.vikings.com/team/players-roster/justin-jefferson/",
+}
+
+
+def page_shell(content: str) -> str:
+    """Wrap the parsed region in the bulk of a real page: head assets, navigation and footer."""
+    scripts = "".join(
+        f"<script>window.__data{index} = {{{'&quot;key&quot;: 1, ' * 150}}};</script>" for index in range(40)
+    )
+    styles = "".join(f"<link rel='stylesheet' href='/assets/style-{index}.css'>" for index in range(30))
+    navigation = "".join(
+        f"<li class='nav-item'><a class='nav-link' href='/section/{index}'><span>Section {index}</span></a></li>"
+        for index in range(400)
+    )
+    promos = "".join(
+        f"<div class='promo'><div class='promo-inner'><img src='/promo/{index}.jpg' alt=''>"
+        f"<h3>Promo {index}</h3><p>{'Lorem ipsum dolor sit amet. ' * 8}</p></div></div>"
+        for index in range(120)
+    )
+    footer = "".join(f"<li><a href='/footer/{index}'>Footer link {index}</a></li>" for index in range(250))
+    return (
+        f"<!DOCTYPE html><html><head><title>Fixture</title>{styles}{scripts}</head><body>"
+        f"<nav><ul>{navigation}</ul></nav><main>{content}</main>"
+        f"<aside>{promos}</aside><footer><ul>{footer}</ul></footer></body></html>"
+    )
+
+
+def vikings_cast_page() -> str:
+    items = "".join(
+        f"<li><a href='/shows/vikings/cast/character-{index}'>"
+        f"<div class='img-container'><img src='https://www.history.com/images/character-{index}.jpg'></div>"
+        f"<strong>Character {index}</strong></a></li>"
+        for index in range(60)
+    )
+    return page_shell(f"<div class='tile-list tile-boxed'><ul>{items}</ul></div>")
+
+
+def vikings_character_page() -> str:
+    paragraphs = "".join(f"<p>{'Ragnar Lothbrok raids the coasts of England. ' * 12}</p>" for _ in range(10))
+    return page_shell(
+        "<header class='section-title'><h1><strong>Ragnar Lothbrok</strong>"
+        "<small>Played by Travis Fimmel</small></h1></header>"
+        f"<article class='main-article'>{paragraphs}</article>"
+    )
+
+
+def norsemen_page() -> str:
+    characters = "".join(
+        f"<li><a href='/wiki/Actor_{index}' title='Actor {index}'>Actor {index}</a> as Character {index}, "
+        f"{'a villager of Norheim. ' * 4}</li>"
+        for index in range(40)
+    )
+    infobox = "".join(f"<tr><td><ul><li>Infobox item {index}</li></ul></td></tr>" for index in range(40))
+    article = "".join(f"<p>{'Norsemen is a Norwegian comedy series. ' * 15}</p>" for _ in range(40))
+    return page_shell(
+        "<div class='mw-content-ltr mw-parser-output'>"
+        f"<table class='infobox'>{infobox}</table>{article}<ul>{characters}</ul>{article}</div>"
+    )
+
+
+def nfl_roster_page() -> str:
+    rows = "".join(
+        f"<tr><td><img class='img-responsive' src='https://static.www.nfl.com/player-{index}.png'>"
+        f"<span class='nfl-o-roster__player-name'><a href='/team/players-roster/player-{index}/'>Player {index}</a>"
+        f"</span></td><td>{index}</td><td>WR</td><td>6-1</td><td>195</td><td>25</td><td>4</td><td>College</td></tr>"
+        for index in range(90)
+    )
+    return page_shell(f"<table><thead><tr><th>Player</th></tr></thead><tbody>{rows}</tbody></table>")
+
+
+def nfl_player_page() -> str:
+    stats = "".join(
+        f"<p><strong>{label}:</strong> {value}</p>"
+        for label, value in [("Height", "6-1"), ("Weight", "195"), ("Age", "25"), ("Experience", "4"), ("College", "LSU")]
+    )
+    headers = ["SEASON", "TEAM", "G", "GS", "REC", "YDS", "AVG", "LNG", "TD", "FUM", "LOST"]
+    seasons = "".join(
+        "<tr>" + f"<td>{season}</td><td>MIN</td>" + "<td>10</td>" * (len(headers) - 2) + "</tr>"
+        for season in range(2023, 2015, -1)
+    )
+    biography = "".join(f"<p>{'Drafted in the first round and named to the Pro Bowl. ' * 10}</p>" for _ in range(30))
+    return page_shell(
+        f"<div class='nfl-t-person-tile__stat-details d3-o-list'>{stats}</div>"
+        "<table summary='Career Stats'><thead><tr>"
+        + "".join(f"<th>{header}</th>" for header in headers)
+        + f"</tr></thead><tbody>{seasons}</tbody></table>"
+        f"<div class='d3-l-grid--inner nfl-c-biography'>{biography}</div>"
+    )
+
+
+SYNTHETIC_FIXTURES = {
+    "vikings_cast": vikings_cast_page,
+    "vikings_character": vikings_character_page,
+    "norsemen": norsemen_page,
+    "nfl_roster": nfl_roster_page,
+    "nfl_player": nfl_player_page,
+}
+
+
+def load_fixture(name: str) -> bytes:
+    """Return the saved fixture page if there is one, else its synthetic stand-in."""
+    path = FIXTURES_DIR / f"{name}.html"
+    if path.exists():
+        return path.read_bytes()
+    return SYNTHETIC_FIXTURES[name]().encode()
+
+
+def save_fixtures():
+    """Download the live pages into benchmarks/fixtures/."""
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    for name, url in FIXTURE_URLS.items():
+        response = requests.get(url, timeout=(5, 30))
+        response.raise_for_status()
+        (FIXTURES_DIR / f"{name}.html").write_bytes(response.content)
+        print(f"Saved {url} to {name}.html ({len(response.content)} bytes)")
+
+
+if __name__ == "__main__":
+    save_fixtures()
@@ -0,0 +1,122 @@
+"""
+Compare a full scrape through bare `requests.get` calls against the pooled
+`SessionPool`, using local stub servers in place of the three scraped hosts.
+
+    python -m benchmarks.http_session --handshake-ms 40 --latency-ms 20
+
+Each stub server counts accepted connections, which is the number of TCP (and,
+against the real hosts, TLS) handshakes the scrape paid for. `--handshake-ms`
+delays every new connection to stand in for the TLS round-trips a localhost
+server does not have.
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from scraping.sessions import SessionPool
+
+PAGE_BODY = b"<html><body>" + b"<p>stub</p>" * 2000 + b"</body></html>"
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handshake_delay, latency):
+        self.handshake_delay = handshake_delay
+        self.latency = latency
+        self.connections = 0
+        self.counter_lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), StubHandler)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.counter_lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_delay)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE_BODY)))
+        self.end_headers()
+        self.wfile.write(PAGE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_scrape(get, hosts, characters, players, workers):
+    """Replay the request pattern of the three RawDataService classes."""
+    history, wikipedia, vikings = hosts
+
+    get(f"{history.base_url}/shows/vikings/cast")
+    for index in range(characters):
+        get(f"{history.base_url}/shows/vikings/cast/character-{index}")
+
+    get(f"{wikipedia.base_url}/wiki/Norsemen_(TV_series)")
+
+    get(f"{vikings.base_url}/team/players-roster/")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        urls = [f"{vikings.base_url}/team/players-roster/player-{index}/" for index in range(players)]
+        list(executor.map(get, urls))
+
+
+def measure(label, get, hosts, args):
+    for server in hosts:
+        server.connections = 0
+    start_time = time.perf_counter()
+    run_scrape(get, hosts, args.characters, args.players, args.workers)
+    elapsed = time.perf_counter() - start_time
+    handshakes = sum(server.connections for server in hosts)
+    print(f"{label:<16} handshakes={handshakes:<5} wall_time={elapsed:.2f}s")
+    return handshakes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--characters", type=int, default=40)
+    parser.add_argument("--players", type=int, default=90)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--handshake-ms", type=float, default=40)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    hosts = [StubServer(args.handshake_ms / 1000, args.latency_ms / 1000) for _ in range(3)]
+    for server in hosts:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    timeout = (5, 30)
+    try:
+        baseline = measure("requests.get", lambda url: requests.get(url, timeout=timeout).content, hosts, args)
+
+        session_pool = SessionPool(pool_maxsize=args.workers, timeout=timeout)
+        pooled = measure("SessionPool", lambda url: session_pool.get(url).content, hosts, args)
+        session_pool.close()
+    finally:
+        for server in hosts:
+            server.shutdown()
+
+    print(
+        f"saved {baseline[0] - pooled[0]} handshakes and "
+        f"{baseline[1] - pooled[1]:.2f}s per full scrape "
+        f"({baseline[1] / pooled[1]:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Time the /metrics/ queries over a large ScrapingLog table.
+
+    python -m benchmarks.metrics_query --rows 1000000
+
+Loads synthetic scraping logs into a throwaway test database, then compares
+the old one-query-per-metric summary with the single-pass live query and the
+rollups, and times the admin filters and the common-errors GROUP BY with and
+without the ScrapingLog indexes.
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.utils import setup_django, test_database
+
+SOURCES = [f"https://www.vikings.com/team/players-roster/player-{index}/" for index in range(200)]
+ERRORS = [f"Error fetching page: {index} Server Error" for index in range(20)]
+
+
+def synthetic_logs(count, start_time):
+    from etl.models import ScrapingLog
+
+    for _ in range(count):
+        failed = random.random() < 0.1
+        source = random.choice(SOURCES)
+        cache_hit = not failed and random.random() < 0.5
+        yield ScrapingLog(
+            task_name=f"Fetch URL: {source}",
+            status="failure" if failed else "success",
+            execution_time=random.uniform(0.05, 3.0),
+            retries=random.randint(0, 3) if failed else 0,
+            error_message=random.choice(ERRORS) if failed else None,
+            source=source,
+            timestamp=start_time - timedelta(seconds=random.randint(0, 90 * 24 * 3600)),
+            cache_hit=cache_hit,
+            response_size=random.randint(20_000, 400_000),
+        )
+
+
+def separate_queries():
+    """The summary as it was computed before: one round-trip per metric."""
+    from django.db.models import Avg, Count, Sum
+
+    from etl.models import ScrapingLog
+
+    total_tasks = ScrapingLog.objects.count()
+    ScrapingLog.objects.filter(status="success").count()
+    ScrapingLog.objects.filter(status="failure").count()
+    ScrapingLog.objects.aggregate(avg_retries=Avg("retries"))
+    ScrapingLog.objects.aggregate(avg_time=Avg("execution_time"))
+    ScrapingLog.objects.filter(cache_hit=True).count()
+    ScrapingLog.objects.filter(cache_hit=True).aggregate(saved=Sum("response_size"))
+    list(
+        ScrapingLog.objects.filter(status="failure")
+        .values("error_message")
+        .annotate(count=Count("error_message"))
+        .order_by("-count")
+    )
+    return total_tasks
+
+
+def timed(label, run, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start_time)
+    print(f"{label:<48} best={min(timings) * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.db.models import Count
+    from django.utils.timezone import now
+
+    from etl.models import ScrapingLog
+    from etl.services import MetricsService
+
+    with test_database():
+        start_time = now()
+        loaded = 0
+        while loaded < args.rows:
+            batch = list(synthetic_logs(min(args.batch_size, args.rows - loaded), start_time))
+            ScrapingLog.objects.bulk_create(batch)
+            MetricsService.record_logs(batch)
+            loaded += len(batch)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {ScrapingLog._meta.db_table}")
+        print(f"Loaded {loaded} scraping logs")
+
+        since = start_time - timedelta(days=7)
+        lookups = {
+            "admin filter status=failure": lambda: list(
+                ScrapingLog.objects.filter(status="failure").order_by("-timestamp")[:100]
+            ),
+            "status=failure in the last 7 days": lambda: ScrapingLog.objects.filter(
+                status="failure", timestamp__gte=since
+            ).count(),
+            "admin filter source": lambda: list(
+                ScrapingLog.objects.filter(source=SOURCES[0]).order_by("-timestamp")[:100]
+            ),
+            "task_name lookup": lambda: ScrapingLog.objects.filter(task_name=f"Fetch URL: {SOURCES[0]}").count(),
+            "common errors GROUP BY, 7d": lambda: list(
+                ScrapingLog.objects.filter(status="failure", timestamp__gte=since)
+                .values("error_message")
+                .annotate(count=Count("error_message"))
+                .order_by("-count")
+            ),
+        }
+
+        timed("metrics: separate queries", separate_queries)
+        timed("metrics: single-pass live query", MetricsService.get_live_scraping_metrics)
+        timed("metrics: single-pass live query, 7d", lambda: MetricsService.get_live_scraping_metrics("7d"))
+        timed("metrics: rollups", MetricsService.get_scraping_metrics)
+        timed("metrics: rollups, 7d", lambda: MetricsService.get_scraping_metrics("7d"))
+
+        for label, lookup in lookups.items():
+            timed(f"{label} (indexed)", lookup)
+        indexes = ScrapingLog._meta.indexes
+        with connection.schema_editor() as schema_editor:
+            for index in indexes:
+                schema_editor.remove_index(ScrapingLog, index)
+        for label, lookup in lookups.items():
+            timed(f"{label} (no indexes)", lookup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Parse throughput of the three parsers for each BeautifulSoup backend.
+
+    python -m benchmarks.parsers --iterations 20
+
+Uses the pages from benchmarks/fixtures.py and checks that every backend
+produces the same parsed output.
+"""
+
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+from benchmarks.fixtures import load_fixture
+from benchmarks.utils import setup_django
+
+BACKENDS = ["html.parser", "lxml"]
+
+
+def get_page_parsers():
+    from scraping.parsers import NFLParser, NorsemenShowParser, VikingsShowParser
+
+    return {
+        "vikings_cast": lambda soup: VikingsShowParser(soup).parse_cast_page(),
+        "vikings_character": lambda soup: VikingsShowParser(soup).parse_character_page(),
+        "norsemen": lambda soup: NorsemenShowParser(soup).parse_character_list(),
+        "nfl_roster": lambda soup: NFLParser(soup).parse_players_table(),
+        "nfl_player": lambda soup: NFLParser(soup).parse_player_details(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    backends = [backend for backend in BACKENDS if builder_registry.lookup(backend)]
+
+    for page, parse in get_page_parsers().items():
+        content = load_fixture(page)
+        outputs = {}
+        timings = {}
+        for backend in backends:
+            start_time = time.perf_counter()
+            for _ in range(args.iterations):
+                outputs[backend] = parse(BeautifulSoup(content, backend))
+            timings[backend] = (time.perf_counter() - start_time) / args.iterations
+
+        baseline = timings[backends[0]]
+        for backend in backends:
+            print(
+                f"{page:<18} {len(content) / 1024:6.0f} KiB  {backend:<12} "
+                f"{timings[backend] * 1000:7.1f} ms/page  {1 / timings[backend]:6.1f} pages/s  "
+                f"{baseline / timings[backend]:4.1f}x"
+            )
+        if any(output != outputs[backends[0]] for output in outputs.values()):
+            print(f"{page:<18} WARNING: backends disagree on the parsed output")
+
+
+if __name__ == "__main__":
+    main()
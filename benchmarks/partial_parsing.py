@@ -0,0 +1,86 @@
+"""
+Parse time and peak memory of full-document parsing against parsing only the
+regions each parser declares.
+
+    python -m benchmarks.partial_parsing --iterations 20
+
+Uses the pages from benchmarks/fixtures.py, the SCRAPING_HTML_PARSER backend,
+and checks that both modes produce the same parsed output.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fixtures import load_fixture
+from benchmarks.utils import setup_django
+
+
+def get_page_parsers():
+    from scraping.parsers import NFLParser, NorsemenShowParser, VikingsShowParser
+
+    return {
+        "vikings_cast": (
+            VikingsShowParser.CAST_PAGE_REGIONS,
+            lambda soup: VikingsShowParser(soup).parse_cast_page(),
+        ),
+        "vikings_character": (
+            VikingsShowParser.CHARACTER_PAGE_REGIONS,
+            lambda soup: VikingsShowParser(soup).parse_character_page(),
+        ),
+        "norsemen": (
+            NorsemenShowParser.CHARACTER_LIST_REGIONS,
+            lambda soup: NorsemenShowParser(soup).parse_character_list(),
+        ),
+        "nfl_roster": (
+            NFLParser.PLAYERS_TABLE_REGIONS,
+            lambda soup: NFLParser(soup).parse_players_table(),
+        ),
+        "nfl_player": (
+            NFLParser.PLAYER_DETAILS_REGIONS,
+            lambda soup: NFLParser(soup).parse_player_details(),
+        ),
+    }
+
+
+def measure(content, backend, parse, parse_only, iterations):
+    """Return the parsed output, mean seconds per page and peak traced bytes of one parse."""
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        parse(BeautifulSoup(content, backend, parse_only=parse_only))
+    elapsed = (time.perf_counter() - start_time) / iterations
+
+    tracemalloc.start()
+    output = parse(BeautifulSoup(content, backend, parse_only=parse_only))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from scraping.parsers import get_html_parser
+
+    backend = get_html_parser()
+    print(f"backend: {backend}")
+    for page, (regions, parse) in get_page_parsers().items():
+        content = load_fixture(page)
+        full_output, full_time, full_peak = measure(content, backend, parse, None, args.iterations)
+        partial_output, partial_time, partial_peak = measure(content, backend, parse, regions, args.iterations)
+        print(
+            f"{page:<18} full {full_time * 1000:6.1f} ms {full_peak / 2**20:5.1f} MiB  "
+            f"targeted {partial_time * 1000:6.1f} ms {partial_peak / 2**20:5.1f} MiB  "
+            f"time -{1 - partial_time / full_time:4.0%}  memory -{1 - partial_peak / full_peak:4.0%}"
+        )
+        if partial_output != full_output:
+            print(f"{page:<18} WARNING: targeted parsing changed the parsed output")
+
+
+if __name__ == "__main__":
+    main()
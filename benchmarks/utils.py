@@ -0,0 +1,42 @@
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    """Configure Django the same way seed.py does."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scraping_app.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Run the benchmark against a throwaway test database, as the test runner does."""
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def measure_queries(label):
+    """Print the wall time and number of SQL queries run inside the block."""
+    from django.db import connection
+
+    query_count = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal query_count
+        query_count += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        start_time = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start_time
+    print(f"{label:<32} queries={query_count:<7} wall_time={elapsed:.2f}s")
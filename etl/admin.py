@@ -8,6 +8,10 @@ from etl.models import (
     NorsemenShow,
     RawVikingsNFL,
     VikingsNFL,
+    PageCache,
+    ETLWatermark,
+    ScrapingLogRollup,
+    ScrapingErrorRollup,
 )
 
 
@@ -76,6 +80,32 @@ class VikingsNFLAdmin(admin.ModelAdmin):
 
 @admin.register(ScrapingLog)
 class ScrapingLogAdmin(admin.ModelAdmin):
-    list_display = ("task_name", "status", "execution_time", "retries", "timestamp")
-    list_filter = ("status", "source")
-    search_fields = ("task_name", "error_message")
\ No newline at end of file
+    list_display = ("task_name", "status", "execution_time", "retries", "cache_hit", "timestamp")
+    list_filter = ("status", "source", "cache_hit")
+    search_fields = ("task_name", "error_message")
+
+
+@admin.register(PageCache)
+class PageCacheAdmin(admin.ModelAdmin):
+    list_display = ("url", "etag", "last_modified", "parsed_by", "updated_at")
+    search_fields = ("url",)
+    exclude = ("content",)
+
+
+@admin.register(ETLWatermark)
+class ETLWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("source", "last_processed_at", "updated_at")
+
+
+@admin.register(ScrapingLogRollup)
+class ScrapingLogRollupAdmin(admin.ModelAdmin):
+    list_display = ("hour", "task_name", "source", "total", "successes", "failures", "cache_hits")
+    list_filter = ("hour",)
+    search_fields = ("task_name", "source")
+
+
+@admin.register(ScrapingErrorRollup)
+class ScrapingErrorRollupAdmin(admin.ModelAdmin):
+    list_display = ("hour", "error_message", "count")
+    list_filter = ("hour",)
+    search_fields = ("error_message",)
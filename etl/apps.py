@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EtlConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "etl"
+
+    def ready(self):
+        from etl import checks, signals  # noqa: F401  Registers the system checks and signal handlers.
@@ -0,0 +1,115 @@
+"""
+Per-source data versions and the API response cache built on them.
+
+Every ETL source has a data version: the time its tables last changed, kept in
+the cache and bumped by the ETL service when a load commits and by the model
+signals in etl.signals when a row is edited, e.g. in the admin. Cached responses are
+keyed by the version of the source behind them, so bumping it invalidates
+every cached page of that source at once and the stale entries simply expire.
+
+The cache is optional: with API_CACHE_TIMEOUT at 0, or while it is
+unreachable, versions are read from the ETL watermarks and responses are
+built on every request.
+"""
+
+import hashlib
+import logging
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from etl.models import ETLWatermark
+
+logger = logging.getLogger(__name__)
+
+
+def cache_get(key):
+    """Read a cache entry; a cache error is logged and reads as a miss."""
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.warning("Could not read %s from the cache", key, exc_info=True)
+        return None
+
+
+def cache_set(key, value, timeout):
+    """Write a cache entry; a cache error is logged and the entry skipped."""
+    try:
+        cache.set(key, value, timeout=timeout)
+    except Exception:
+        logger.warning("Could not write %s to the cache", key, exc_info=True)
+
+
+def cache_add(key, value, timeout):
+    """Write a cache entry unless it exists; a cache error is logged and the entry skipped."""
+    try:
+        cache.add(key, value, timeout=timeout)
+    except Exception:
+        logger.warning("Could not write %s to the cache", key, exc_info=True)
+
+
+def get_data_version_key(source: str) -> str:
+    return f"etl:data_version:{source}"
+
+
+def get_data_version(source: str) -> float:
+    """
+    Return the source's data version as a Unix timestamp.
+
+    When the cache is disabled, unreachable or has lost it, it is read from
+    the source's ETL watermark, which is saved at the end of every load.
+    """
+    if not settings.API_CACHE_TIMEOUT:
+        return get_watermark_version(source)
+    version = cache_get(get_data_version_key(source))
+    if version is None:
+        version = get_watermark_version(source)
+        cache_add(get_data_version_key(source), version, timeout=None)
+    return version
+
+
+def get_watermark_version(source: str) -> float:
+    changed_at = ETLWatermark.objects.filter(source=source).values_list("updated_at", flat=True).first()
+    return changed_at.timestamp() if changed_at else 0.0
+
+
+def bump_data_version(source: str) -> float:
+    """
+    Mark the source's tables as changed, invalidating their cached API responses.
+
+    Touches the source's ETL watermark, whose `updated_at` is the version, so
+    it also changes while the cache is disabled or unreachable.
+    """
+    watermark, _ = ETLWatermark.objects.get_or_create(source=source)
+    watermark.save(update_fields=["updated_at"])
+    version = watermark.updated_at.timestamp()
+    cache_set(get_data_version_key(source), version, timeout=None)
+    return version
+
+
+def get_request_fingerprint(request) -> str:
+    """
+    Hash the host, path and sorted query string, so parameter order does not
+    matter, plus the negotiated format, which an Accept header can also pick.
+    """
+    query = urlencode(sorted((key, value) for key, values in request.GET.lists() for value in values))
+    renderer = getattr(request, "accepted_renderer", None)
+    media_format = renderer.format if renderer else ""
+    return hashlib.sha256(f"{request.get_host()}{request.path}?{query}#{media_format}".encode()).hexdigest()
+
+
+def get_response_cache_key(request, source: str, version: float) -> str:
+    """Key a GET response by its source's data version and the request fingerprint."""
+    return f"api:response:{source}:{version}:{get_request_fingerprint(request)}"
+
+
+def get_response_etag(request, version: float) -> str:
+    """
+    Return a strong ETag for a GET response.
+
+    The response body only changes with the data, and every change bumps the
+    data version, so the version and the request fingerprint identify it byte
+    for byte.
+    """
+    return f'"{hashlib.sha256(f"{version}:{get_request_fingerprint(request)}".encode()).hexdigest()[:32]}"'
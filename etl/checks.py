@@ -0,0 +1,74 @@
+from django.core.checks import Error, Tags, register
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.migrations.executor import MigrationExecutor
+
+from etl import partitions
+from etl.models import CareerStat, ScrapingLog
+
+
+def get_pending_scraping_log_migrations() -> list:
+    """Return the unapplied migrations with an operation on the ScrapingLog model."""
+    model_name = ScrapingLog._meta.model_name
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [
+        migration
+        for migration, backwards in plan
+        if not backwards
+        and migration.app_label == ScrapingLog._meta.app_label
+        and any(
+            model_name in (getattr(operation, "model_name", None), getattr(operation, "name_lower", None))
+            for operation in migration.operations
+        )
+    ]
+
+
+@register(Tags.database)
+def check_partitioned_scraping_log_migrations(app_configs, databases=None, **kwargs):
+    """
+    Stop `migrate` from altering a partitioned ScrapingLog unreviewed.
+
+    partition_scraping_log rebuilds the table outside the migrations: its
+    primary key becomes (id, timestamp) and it is split into monthly
+    partitions, none of which Django's migration state knows about. A
+    migration that changes the primary key or adds a unique constraint
+    without `timestamp` fails, or worse, half applies.
+    """
+    if DEFAULT_DB_ALIAS not in (databases or []) or not partitions.is_partitioned():
+        return []
+    return [
+        Error(
+            f"Migration {migration.app_label}.{migration.name} alters ScrapingLog, "
+            "which is partitioned outside the migrations.",
+            hint=(
+                "Check its operations against the partitioned table: the primary key is (id, timestamp) "
+                "and unique constraints must include timestamp. Then run migrate with --skip-checks."
+            ),
+            id="etl.E001",
+        )
+        for migration in get_pending_scraping_log_migrations()
+    ]
+
+
+@register(Tags.database)
+def check_career_stat_nulls_not_distinct(app_configs, databases=None, **kwargs):
+    """
+    Require PostgreSQL 15 for CareerStat's NULLS NOT DISTINCT key.
+
+    Seasons without a team are stored with a NULL team. Before PostgreSQL 15
+    Django skips the constraint (models.W047), so reloads duplicate those
+    seasons and the career stat upsert has no key to conflict on. Other
+    backends, e.g. SQLite for tests, are left to models.W047.
+    """
+    if DEFAULT_DB_ALIAS not in (databases or []) or connection.vendor != "postgresql":
+        return []
+    if connection.features.supports_nulls_distinct_unique_constraints:
+        return []
+    return [
+        Error(
+            f"{connection.display_name} does not support the NULLS NOT DISTINCT constraint "
+            f"{CareerStat._meta.constraints[0].name}.",
+            hint="Career stats need PostgreSQL 15 or later.",
+            id="etl.E002",
+        )
+    ]
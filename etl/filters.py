@@ -0,0 +1,70 @@
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework.filters import SearchFilter
+
+SEARCH_CONFIG = "english"
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    `?search=` against the model's `search_vector` column, ranked by relevance.
+
+    A row matches when the tsvector matches the query (web search syntax:
+    quoted phrases, `or`, `-term`) or, for plain queries, when one of the
+    view's `search_trigram_fields` is similar to it, so misspelled names still
+    match. Both conditions are served by GIN indexes. Plain queries also match
+    the view's `search_substring_fields`, the `search_fields` left out of the
+    tsvector such as URLs, with the same case-insensitive substring match as
+    the fallback. Results come back best match first unless the client asks
+    for an `?ordering=`.
+
+    Databases other than PostgreSQL fall back to the ILIKE search over
+    `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        search_text = " ".join(search_terms)
+
+        query = SearchQuery(search_text, search_type="websearch", config=SEARCH_CONFIG)
+        trigram_fields = getattr(view, "search_trigram_fields", [])
+        substring_fields = getattr(view, "search_substring_fields", [])
+        if self.uses_search_operators(search_terms):
+            # Fuzzy and substring matches would bring back rows the operators exclude.
+            trigram_fields = substring_fields = []
+        condition = Q(search_vector=query)
+        for field in trigram_fields:
+            condition |= Q(**{f"{field}__trigram_similar": search_text})
+        if substring_fields:
+            # Every term in one of the fields, as in the fallback.
+            condition |= reduce(
+                operator.and_,
+                (
+                    reduce(operator.or_, (Q(**{f"{field}__icontains": term}) for field in substring_fields))
+                    for term in search_terms
+                ),
+            )
+
+        annotations = {"search_rank": SearchRank(F("search_vector"), query)}
+        ordering = ["-search_rank"]
+        if trigram_fields:
+            similarities = [TrigramSimilarity(field, search_text) for field in trigram_fields]
+            annotations["search_similarity"] = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+            ordering.append("-search_similarity")
+        return queryset.filter(condition).annotate(**annotations).order_by(*ordering, "pk")
+
+    @staticmethod
+    def uses_search_operators(search_terms):
+        return any(
+            term.startswith("-") or '"' in term or term.lower() == "or" for term in search_terms
+        )
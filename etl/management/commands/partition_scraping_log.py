@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.timezone import now
+
+from etl import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert the ScrapingLog table to monthly range partitions on PostgreSQL, "
+        "so the retention job can drop expired months whole. Locks the table while rows are copied."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("ScrapingLog partitioning needs PostgreSQL.")
+        if partitions.is_partitioned():
+            self.stdout.write("ScrapingLog is already partitioned.")
+            return
+        partitions.partition_scraping_log(now(), settings.SCRAPING_LOG_PARTITION_MONTHS_AHEAD)
+        self.stdout.write(
+            self.style.SUCCESS(f"Partitioned ScrapingLog into {len(partitions.get_partitions())} monthly partitions.")
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from etl.services import ScrapingLogRetentionService
+
+
+class Command(BaseCommand):
+    help = "Delete ScrapingLog rows past their retention and compact the old metrics rollups."
+
+    def handle(self, *args, **options):
+        result = ScrapingLogRetentionService().handle()
+        self.stdout.write(f"Compacted {result['compacted_rollups']} hourly rollups into daily ones.")
+        for partition in result["dropped_partitions"]:
+            self.stdout.write(f"Dropped partition {partition}.")
+        self.stdout.write(self.style.SUCCESS(f"Deleted {result['deleted_logs']} scraping logs."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from etl.services import ETL_SERVICES
+
+
+class Command(BaseCommand):
+    help = "Replay every raw snapshot through the ETL services, ignoring their watermarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "sources",
+            nargs="*",
+            help=f"ETL sources to rebuild ({', '.join(ETL_SERVICES)}), all of them by default.",
+        )
+
+    def handle(self, *args, **options):
+        # Checked here: argparse rejects an empty `nargs="*"` list when it has choices.
+        if unknown := [source for source in options["sources"] if source not in ETL_SERVICES]:
+            raise CommandError(f"Unknown ETL sources: {', '.join(unknown)}. Choose from {', '.join(ETL_SERVICES)}.")
+        for source in options["sources"] or ETL_SERVICES:
+            self.stdout.write(f"Rebuilding {source}...")
+            ETL_SERVICES[source]().handle(full_rebuild=True)
+        self.stdout.write(self.style.SUCCESS("ETL rebuild completed."))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:14
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0008_rename_actor_name_norsemenshow_name_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageCache",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("url", models.URLField(max_length=500, unique=True)),
+                ("etag", models.CharField(blank=True, max_length=255, null=True)),
+                (
+                    "last_modified",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("content", models.BinaryField()),
+                ("parsed_by", models.CharField(blank=True, max_length=255, null=True)),
+                ("parsed_data", models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Page Cache",
+                "verbose_name_plural": "Page Cache",
+            },
+        ),
+        migrations.AddField(
+            model_name="scrapinglog",
+            name="cache_hit",
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="scrapinglog",
+            name="response_size",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:19
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0010_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ETLWatermark",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("source", models.CharField(max_length=255, unique=True)),
+                ("last_processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "ETL Watermark",
+                "verbose_name_plural": "ETL Watermarks",
+            },
+        ),
+    ]
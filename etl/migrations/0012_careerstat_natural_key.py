@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:19
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def collapse_duplicate_career_stats(apps, schema_editor):
+    """Keep only the most recently updated row for each (player, season, team)."""
+    CareerStat = apps.get_model("etl", "CareerStat")
+
+    duplicate_keys = (
+        CareerStat.objects.values("player", "season", "team")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+    )
+    for key in duplicate_keys:
+        duplicates = CareerStat.objects.filter(
+            player=key["player"], season=key["season"], team=key["team"]
+        ).order_by("-updated_at", "-created_at")
+        stale_ids = list(duplicates.values_list("id", flat=True)[1:])
+        CareerStat.objects.filter(id__in=stale_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0011_etlwatermark"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            collapse_duplicate_career_stats, reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="careerstat",
+            constraint=models.UniqueConstraint(
+                fields=("player", "season", "team"),
+                name="unique_career_stat_player_season_team",
+                nulls_distinct=False,
+            ),
+        ),
+    ]
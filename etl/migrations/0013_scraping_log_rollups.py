@@ -0,0 +1,141 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:25
+
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncHour
+
+ROLLUP_COUNTERS = [
+    "total",
+    "successes",
+    "failures",
+    "execution_time_sum",
+    "retries_sum",
+    "cache_hits",
+    "bandwidth_saved",
+]
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build the hourly rollups from the ScrapingLog rows written before they existed."""
+    ScrapingLog = apps.get_model("etl", "ScrapingLog")
+    ScrapingLogRollup = apps.get_model("etl", "ScrapingLogRollup")
+    ScrapingErrorRollup = apps.get_model("etl", "ScrapingErrorRollup")
+
+    rollups = (
+        ScrapingLog.objects.annotate(hour=TruncHour("timestamp"))
+        .values("hour", "task_name", "source")
+        .annotate(
+            total=Count("id"),
+            successes=Count("id", filter=Q(status="success")),
+            failures=Count("id", filter=Q(status="failure")),
+            execution_time_sum=Sum("execution_time"),
+            retries_sum=Sum("retries"),
+            cache_hits=Count("id", filter=Q(cache_hit=True)),
+            bandwidth_saved=Coalesce(Sum("response_size", filter=Q(cache_hit=True)), 0),
+        )
+        .order_by()
+    )
+    merged = {}
+    for row in rollups.iterator():
+        # NULL and empty sources share one rollup row.
+        key = (row["hour"], row["task_name"], row["source"] or "")
+        if key in merged:
+            for field in ROLLUP_COUNTERS:
+                setattr(merged[key], field, getattr(merged[key], field) + row[field])
+            continue
+        merged[key] = ScrapingLogRollup(**{**row, "source": key[2]})
+    ScrapingLogRollup.objects.bulk_create(merged.values(), batch_size=1000)
+
+    errors = (
+        ScrapingLog.objects.filter(status="failure")
+        .exclude(error_message__isnull=True)
+        .exclude(error_message="")
+        .annotate(hour=TruncHour("timestamp"))
+        .values("hour", "error_message")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    ScrapingErrorRollup.objects.bulk_create(
+        (
+            ScrapingErrorRollup(
+                error_hash=hashlib.sha256(row["error_message"].encode()).hexdigest(), **row
+            )
+            for row in errors.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0012_careerstat_natural_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScrapingErrorRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("error_hash", models.CharField(max_length=64)),
+                ("error_message", models.TextField(blank=True, null=True)),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Scraping Error Rollup",
+                "verbose_name_plural": "Scraping Error Rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("hour", "error_hash"),
+                        name="unique_scraping_error_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ScrapingLogRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("task_name", models.CharField(max_length=255)),
+                ("source", models.CharField(blank=True, default="", max_length=255)),
+                ("total", models.IntegerField(default=0)),
+                ("successes", models.IntegerField(default=0)),
+                ("failures", models.IntegerField(default=0)),
+                ("execution_time_sum", models.FloatField(default=0)),
+                ("retries_sum", models.IntegerField(default=0)),
+                ("cache_hits", models.IntegerField(default=0)),
+                ("bandwidth_saved", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Scraping Log Rollup",
+                "verbose_name_plural": "Scraping Log Rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("hour", "task_name", "source"),
+                        name="unique_scraping_log_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0013_scraping_log_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="scrapinglog",
+            index=models.Index(
+                fields=["status", "timestamp"], name="scrapinglog_status_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scrapinglog",
+            index=models.Index(
+                fields=["source", "timestamp"], name="scrapinglog_source_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scrapinglog",
+            index=models.Index(fields=["task_name"], name="scrapinglog_task_name_idx"),
+        ),
+    ]
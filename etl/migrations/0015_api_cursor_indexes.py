@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0014_scrapinglog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="norsemenshow",
+            index=models.Index(
+                fields=["character_name", "id"], name="norsemenshow_cursor_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vikingsnfl",
+            index=models.Index(fields=["name", "id"], name="vikingsnfl_cursor_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vikingsshow",
+            index=models.Index(
+                fields=["character_name", "id"], name="vikingsshow_cursor_idx"
+            ),
+        ),
+    ]
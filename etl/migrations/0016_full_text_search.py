@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:39
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Columns folded into each table's search_vector, with their rank weight.
+SEARCH_VECTOR_COLUMNS = {
+    "etl_vikingsshow": [("character_name", "A"), ("name", "A"), ("character_description", "C")],
+    "etl_norsemenshow": [("character_name", "A"), ("name", "A"), ("description", "C")],
+    "etl_vikingsnfl": [("name", "A"), ("college", "B"), ("biography_html", "C")],
+}
+# Name columns that also get a trigram index for fuzzy matching.
+TRIGRAM_COLUMNS = {
+    "etl_vikingsshow": ["character_name", "name"],
+    "etl_norsemenshow": ["character_name", "name"],
+    "etl_vikingsnfl": ["name"],
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    """Maintain search_vector with a trigger and index it, on PostgreSQL only."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, columns in SEARCH_VECTOR_COLUMNS.items():
+        vector = " || ".join(
+            f"setweight(to_tsvector('english', coalesce(NEW.{column}, '')), '{weight}')"
+            for column, weight in columns
+        )
+        schema_editor.execute(
+            f"CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$ "
+            f"BEGIN NEW.search_vector := {vector}; RETURN NEW; END "
+            "$$ LANGUAGE plpgsql"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {table}_search_vector_update BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()"
+        )
+        # Fire the trigger once for the rows already loaded.
+        schema_editor.execute(f"UPDATE {table} SET search_vector = NULL")
+        schema_editor.execute(f"CREATE INDEX {table}_search_vector_idx ON {table} USING gin (search_vector)")
+        for column in TRIGRAM_COLUMNS[table]:
+            schema_editor.execute(
+                f"CREATE INDEX {table}_{column}_trgm_idx ON {table} USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in SEARCH_VECTOR_COLUMNS:
+        schema_editor.execute(f"DROP TRIGGER {table}_search_vector_update ON {table}")
+        schema_editor.execute(f"DROP FUNCTION {table}_search_vector_update()")
+        schema_editor.execute(f"DROP INDEX {table}_search_vector_idx")
+        for column in TRIGRAM_COLUMNS[table]:
+            schema_editor.execute(f"DROP INDEX {table}_{column}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0015_api_cursor_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="norsemenshow",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="vikingsnfl",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="vikingsshow",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_indexes, reverse_code=drop_search_indexes),
+    ]
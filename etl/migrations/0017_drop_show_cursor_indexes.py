@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("etl", "0016_full_text_search"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="norsemenshow",
+            name="norsemenshow_cursor_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="vikingsshow",
+            name="vikingsshow_cursor_idx",
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from mixins import BaseModel
 from django.utils.timezone import now
@@ -7,6 +8,7 @@ class RawVikingsShow(BaseModel):
     """"""
 
     data = models.JSONField()
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
 
     class Meta:
         """"""
@@ -21,6 +23,8 @@ class VikingsShow(models.Model):
     name = models.CharField(max_length=255)
     character_name = models.CharField(max_length=255, unique=True)
     character_description = models.TextField(blank=True, null=True)
+    # Kept up to date by a database trigger; see migration 0016_full_text_search.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Vikings Show"
@@ -31,6 +35,7 @@ class RawNorsemenShow(BaseModel):
     """"""
 
     data = models.JSONField()
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
 
     class Meta:
         """"""
@@ -45,6 +50,8 @@ class NorsemenShow(BaseModel):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     character_name = models.CharField(max_length=255, unique=True)
+    # Kept up to date by a database trigger; see migration 0016_full_text_search.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         """"""
@@ -57,6 +64,7 @@ class RawVikingsNFL(BaseModel):
     """"""
 
     data = models.JSONField()
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
 
     class Meta:
         """"""
@@ -77,12 +85,15 @@ class VikingsNFL(BaseModel):
     profile_link = models.URLField(max_length=500)
     biography_html = models.TextField(blank=True, null=True)
     image_src = models.URLField(max_length=500, blank=True, null=True)
+    # Kept up to date by a database trigger; see migration 0016_full_text_search.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         """"""
 
         verbose_name = "Vikings NFL"
         verbose_name_plural = "Vikings NFL"
+        indexes = [models.Index(fields=["name", "id"], name="vikingsnfl_cursor_idx")]
 
 
 class CareerStat(BaseModel):
@@ -105,6 +116,13 @@ class CareerStat(BaseModel):
     class Meta:
         verbose_name = "Career Stat"
         verbose_name_plural = "Career Stats"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["player", "season", "team"],
+                name="unique_career_stat_player_season_team",
+                nulls_distinct=False,
+            ),
+        ]
 
 class ScrapingLog(models.Model):
     task_name = models.CharField(max_length=255)
@@ -114,6 +132,104 @@ class ScrapingLog(models.Model):
     error_message = models.TextField(null=True, blank=True)
     source = models.CharField(max_length=255, null=True, blank=True)
     timestamp = models.DateTimeField(default=now)
+    cache_hit = models.BooleanField(null=True, blank=True)
+    response_size = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "timestamp"], name="scrapinglog_status_ts_idx"),
+            models.Index(fields=["source", "timestamp"], name="scrapinglog_source_ts_idx"),
+            models.Index(fields=["task_name"], name="scrapinglog_task_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} - {self.status} at {self.timestamp}"
+
+
+class ScrapingLogRollup(models.Model):
+    """
+    ScrapingLog counters per task, source host and hour, kept up to date as logs
+    are written. Per-page tasks are counted under their task name without the
+    page; see etl.services.get_rollup_key.
+    """
+
+    hour = models.DateTimeField()
+    task_name = models.CharField(max_length=255)
+    source = models.CharField(max_length=255, default="", blank=True)
+    total = models.IntegerField(default=0)
+    successes = models.IntegerField(default=0)
+    failures = models.IntegerField(default=0)
+    execution_time_sum = models.FloatField(default=0)
+    retries_sum = models.IntegerField(default=0)
+    cache_hits = models.IntegerField(default=0)
+    bandwidth_saved = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Scraping Log Rollup"
+        verbose_name_plural = "Scraping Log Rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hour", "task_name", "source"], name="unique_scraping_log_rollup"
+            ),
+        ]
+
+    @property
+    def average_execution_time(self):
+        return self.execution_time_sum / self.total if self.total else 0
+
+
+class ScrapingErrorRollup(models.Model):
+    """Failure counts per error message and hour."""
+
+    hour = models.DateTimeField()
+    error_hash = models.CharField(max_length=64)
+    error_message = models.TextField(null=True, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Scraping Error Rollup"
+        verbose_name_plural = "Scraping Error Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["hour", "error_hash"], name="unique_scraping_error_rollup"),
+        ]
+
+
+class PageCache(BaseModel):
+    """Last fetched body and HTTP validators of a scraped url."""
+
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, null=True, blank=True)
+    last_modified = models.CharField(max_length=255, null=True, blank=True)
+    content = models.BinaryField()
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+    parsed_by = models.CharField(max_length=255, null=True, blank=True)
+    parsed_data = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        """"""
+
+        verbose_name = "Page Cache"
+        verbose_name_plural = "Page Cache"
+
+    def __str__(self):
+        return self.url
+
+
+class ETLWatermark(BaseModel):
+    """
+    Creation time of the newest raw snapshot an ETL source has processed.
+
+    `updated_at` doubles as the source's data version; see etl.cache.
+    """
+
+    source = models.CharField(max_length=255, unique=True)
+    last_processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """"""
+
+        verbose_name = "ETL Watermark"
+        verbose_name_plural = "ETL Watermarks"
 
     def __str__(self):
-        return f"{self.task_name} - {self.status} at {self.timestamp}"
\ No newline at end of file
+        return f"{self.source} processed until {self.last_processed_at}"
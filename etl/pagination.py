@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.pagination import CursorPagination
+
+
+class ShowCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the view's `cursor_ordering`, e.g. (name, id).
+
+    Each page is found with an indexed WHERE on the ordering key instead of an
+    OFFSET, and no COUNT(*) runs, so deep pages cost the same as the first one.
+    Clients may ask for up to API_MAX_PAGE_SIZE rows with `?page_size=`.
+    """
+
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        self.ordering = view.cursor_ordering
+        ordering = super().get_ordering(request, queryset, view)
+        # An ?ordering= from the client may not be unique; id keeps the order stable.
+        if not any(self.is_unique(queryset.model, field.lstrip("-")) for field in ordering):
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+        return ordering
+
+    def is_unique(self, model, name):
+        """Return whether the column `name` alone orders `model` rows stably, e.g. its unique index."""
+        if name == "pk":
+            return True
+        try:
+            return model._meta.get_field(name).unique
+        except FieldDoesNotExist:
+            return False
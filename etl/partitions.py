@@ -0,0 +1,158 @@
+"""
+Optional monthly range partitioning of the ScrapingLog table on PostgreSQL.
+
+`partition_scraping_log` converts the table once (see the management command of
+the same name); afterwards the retention job keeps upcoming partitions created
+and drops expired ones whole instead of deleting their rows.
+"""
+
+import re
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+
+from etl.models import ScrapingLog
+
+PARTITION_NAME = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(moment: datetime, months_ahead=0) -> datetime:
+    """Return midnight UTC on the first day of the month `months_ahead` after `moment`."""
+    month_index = moment.year * 12 + moment.month - 1 + months_ahead
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def get_table_name() -> str:
+    return ScrapingLog._meta.db_table
+
+
+def get_partition_name(month: datetime) -> str:
+    return f"{get_table_name()}_p{month:%Y%m}"
+
+
+def is_partitioned() -> bool:
+    """Whether ScrapingLog is a partitioned table in the current database."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [get_table_name()],
+        )
+        return cursor.fetchone()[0]
+
+
+def get_partitions() -> dict:
+    """Map the start of each monthly partition to its table name; the default partition is left out."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [get_table_name()],
+        )
+        partitions = {}
+        for (name,) in cursor.fetchall():
+            if match := PARTITION_NAME.search(name):
+                year, month = map(int, match.groups())
+                partitions[datetime(year, month, 1, tzinfo=timezone.utc)] = name
+        return partitions
+
+
+def create_partition(cursor, month: datetime, parent=None):
+    quote_name = connection.ops.quote_name
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {quote_name(get_partition_name(month))} "
+        f"PARTITION OF {quote_name(parent or get_table_name())} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{month_start(month, 1).isoformat()}')"
+    )
+
+
+def get_default_partition_name() -> str:
+    return f"{get_table_name()}_default"
+
+
+def ensure_partitions(now: datetime, months_ahead: int):
+    """
+    Create the partitions for the current month and the next `months_ahead` months.
+
+    Rows of a missing month may already sit in the default partition, which
+    PostgreSQL refuses to create the month's partition over, so they are moved
+    into it in the same transaction.
+    """
+    quote_name = connection.ops.quote_name
+    table, default = quote_name(get_table_name()), quote_name(get_default_partition_name())
+    moving = quote_name(f"{get_table_name()}_moving")
+    with transaction.atomic(), connection.cursor() as cursor:
+        existing = get_partitions()
+        for offset in range(months_ahead + 1):
+            month = month_start(now, offset)
+            if month in existing:
+                continue
+            bounds = [month, month_start(month, 1)]
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {moving} AS SELECT * FROM {default} WHERE timestamp >= %s AND timestamp < %s",
+                bounds,
+            )
+            cursor.execute(f"DELETE FROM {default} WHERE timestamp >= %s AND timestamp < %s", bounds)
+            create_partition(cursor, month)
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM {moving}")
+            cursor.execute(f"DROP TABLE {moving}")
+
+
+def drop_partitions_before(cutoff: datetime) -> list:
+    """Drop every monthly partition that ends on or before `cutoff` and return their names."""
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in sorted(get_partitions().items()):
+            if month_start(month, 1) <= cutoff:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+                dropped.append(name)
+    return dropped
+
+
+def partition_scraping_log(now: datetime, months_ahead: int):
+    """
+    Rebuild ScrapingLog as a table partitioned by month on `timestamp`.
+
+    Existing rows are copied into one partition per month plus a default
+    partition for anything out of range. PostgreSQL requires the partition key
+    in the primary key, so it becomes (id, timestamp); ids keep coming from a
+    sequence, so Django still sees `id` as unique. Runs in one transaction and
+    locks the table for the duration of the copy.
+    """
+    quote_name = connection.ops.quote_name
+    table_name = get_table_name()
+    new_table_name = f"{table_name}_partitioned"
+    table, new_table = quote_name(table_name), quote_name(new_table_name)
+    sequence = quote_name(f"{table_name}_id_seq")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT MIN(timestamp), MAX(id) FROM {table}")
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(
+            f"CREATE TABLE {new_table} (LIKE {table} INCLUDING DEFAULTS, PRIMARY KEY (id, timestamp)) "
+            "PARTITION BY RANGE (timestamp)"
+        )
+        cursor.execute(f"CREATE TABLE {quote_name(get_default_partition_name())} PARTITION OF {new_table} DEFAULT")
+        month = month_start(oldest or now)
+        while month <= month_start(now, months_ahead):
+            create_partition(cursor, month, parent=new_table_name)
+            month = month_start(month, 1)
+
+        cursor.execute(f"INSERT INTO {new_table} SELECT * FROM {table}")
+        # Dropping the old table also drops its id sequence and indexes, freeing their names.
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+        cursor.execute(
+            f"ALTER TABLE {table} RENAME CONSTRAINT {quote_name(f'{new_table_name}_pkey')} "
+            f"TO {quote_name(f'{table_name}_pkey')}"
+        )
+        cursor.execute(f"CREATE SEQUENCE {sequence} START WITH {(max_id or 0) + 1} OWNED BY {table}.id")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for index in ScrapingLog._meta.indexes:
+                schema_editor.add_index(ScrapingLog, index)
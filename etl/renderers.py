@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Renderer for the streaming exports.
+
+    Export rows never go through `render`: the view passes them to `stream`,
+    which encodes them one at a time and yields them in chunks of about
+    `chunk_bytes`. `render` only handles error responses.
+    """
+
+    charset = "utf-8"
+    chunk_bytes = 64 * 1024
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        return b"".join(self.stream([data], list(data)))
+
+    def stream(self, rows, fields):
+        """Yield the encoded `rows`, restricted to `fields`, in chunks."""
+        chunk = io.StringIO()
+        for text in self.encode(rows, fields):
+            chunk.write(text)
+            if chunk.tell() >= self.chunk_bytes:
+                yield chunk.getvalue().encode(self.charset)
+                chunk = io.StringIO()
+        if chunk.tell():
+            yield chunk.getvalue().encode(self.charset)
+
+    def encode(self, rows, fields):
+        """Yield the text of each row."""
+        raise NotImplementedError
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Newline-delimited JSON: one object per row."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def encode(self, rows, fields):
+        for row in rows:
+            yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+
+class CSVRenderer(StreamingRenderer):
+    """CSV with a header row; nested values are written as JSON."""
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def encode(self, rows, fields):
+        line = io.StringIO()
+        writer = csv.DictWriter(line, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    field: json.dumps(value, cls=JSONEncoder) if isinstance(value, (dict, list)) else value
+                    for field, value in row.items()
+                }
+            )
+            yield line.getvalue()
+            line.seek(0)
+            line.truncate()
+        yield line.getvalue()
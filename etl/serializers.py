@@ -2,27 +2,47 @@ from rest_framework import serializers
 from .models import VikingsShow, NorsemenShow, VikingsNFL, CareerStat
 
 
-class VikingsShowSerializer(serializers.ModelSerializer):
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that renders only the `fields` it is given, minus any in `exclude`.
+
+    `Meta.list_exclude` names heavy fields, such as raw HTML, that list views
+    leave out unless the client asks for them with `?fields=`.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        unknown = (set(fields or ()) | set(exclude or ())) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"Unknown fields: {', '.join(sorted(unknown))}. Expected any of: {', '.join(self.fields)}."}
+            )
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or name in (exclude or ()):
+                self.fields.pop(name)
+
+
+class VikingsShowSerializer(SparseFieldsetSerializer):
     """"""
 
     class Meta:
         """"""
 
         model = VikingsShow
-        fields = "__all__"
+        exclude = ["search_vector"]
 
 
-class NorsemenShowSerializer(serializers.ModelSerializer):
+class NorsemenShowSerializer(SparseFieldsetSerializer):
     """"""
 
     class Meta:
         """"""
 
         model = NorsemenShow
-        fields = "__all__"
+        exclude = ["search_vector"]
 
 
-class CareerStatSerializer(serializers.ModelSerializer):
+class CareerStatSerializer(SparseFieldsetSerializer):
     """"""
 
     class Meta:
@@ -30,7 +50,7 @@ class CareerStatSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class VikingsNFLSerializer(serializers.ModelSerializer):
+class VikingsNFLSerializer(SparseFieldsetSerializer):
     """"""
 
     career_stats = CareerStatSerializer(many=True, read_only=True)
@@ -39,4 +59,5 @@ class VikingsNFLSerializer(serializers.ModelSerializer):
         """"""
 
         model = VikingsNFL
-        fields = "__all__"
+        exclude = ["search_vector"]
+        list_exclude = ["biography_html"]
@@ -1,87 +1,273 @@
-from django.db import transaction
+import hashlib
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlsplit
 
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from etl import partitions
+from etl.cache import bump_data_version
 from etl.models import (
     RawVikingsShow,
-    ScrapingLog,
     VikingsShow,
     NorsemenShow,
     RawNorsemenShow,
     VikingsNFL,
     RawVikingsNFL,
     CareerStat,
+    ETLWatermark,
+    ScrapingLog,
+    ScrapingLogRollup,
+    ScrapingErrorRollup,
 )
-from django.db.models import Count, Avg
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.db.models.functions import TruncDay
 
 
-class VikingsShowService:
+def bulk_upsert(model, objects, update_fields, unique_fields=("character_name",)):
+    """Insert or update `objects` in one transaction with batched INSERT ... ON CONFLICT statements."""
+    with transaction.atomic():
+        model.objects.bulk_create(
+            objects,
+            batch_size=settings.ETL_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=list(unique_fields),
+            update_fields=update_fields,
+        )
 
-    def handle(self):
+
+def increment_counters(model, rows, unique_fields, counter_fields):
+    """
+    Insert `rows` or add their counters to the stored ones, with INSERT ... ON CONFLICT
+    statements of at most ETL_BULK_BATCH_SIZE rows.
+
+    Each row is a dict with a value for every column; on conflict only
+    `counter_fields` change, so concurrent writers never lose an increment.
+    """
+    if not rows:
+        return
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in rows[0]]
+    table = quote_name(model._meta.db_table)
+    row_placeholder = f"({', '.join(['%s'] * len(fields))})"
+    counter_columns = [quote_name(model._meta.get_field(name).column) for name in counter_fields]
+    on_conflict = (
+        f"ON CONFLICT ({', '.join(quote_name(model._meta.get_field(name).column) for name in unique_fields)}) "
+        f"DO UPDATE SET {', '.join(f'{column} = {table}.{column} + EXCLUDED.{column}' for column in counter_columns)}"
+    )
+    batch_size = min(settings.ETL_BULK_BATCH_SIZE, connection.ops.bulk_batch_size(fields, rows))
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote_name(field.column) for field in fields)}) "
+                f"VALUES {', '.join([row_placeholder] * len(batch))} {on_conflict}",
+                [field.get_db_prep_save(row[field.name], connection) for row in batch for field in fields],
+            )
+
+
+class BaseETLService:
+    """Base class for ETL services that consume raw snapshots newer than a per-source watermark."""
+
+    raw_model = None
+    source = None
+
+    def handle(self, full_rebuild=False, **kwargs):
+        """
+        Process the raw snapshots created since the last successful run.
+
+        `full_rebuild` ignores the watermark and replays every snapshot, for backfills.
+        """
+
+        watermark, _ = ETLWatermark.objects.get_or_create(source=self.source)
+        raw_snapshots = self.raw_model.objects.order_by("created_at")
+        if watermark.last_processed_at and not full_rebuild:
+            raw_snapshots = raw_snapshots.filter(created_at__gt=watermark.last_processed_at)
+
+        # Pin the upper bound so snapshots written mid-run are left for the next one.
+        processed_until = raw_snapshots.aggregate(latest=Max("created_at"))["latest"]
+        if processed_until is None:
+            return
+
+        self.process(raw_snapshots.filter(created_at__lte=processed_until), **kwargs)
+        watermark.last_processed_at = processed_until
+        watermark.save(update_fields=["last_processed_at", "updated_at"])
+        # Invalidates the cached API responses once the load is visible to readers.
+        transaction.on_commit(lambda: bump_data_version(self.source))
+
+    def process(self, raw_snapshots, **kwargs):
+        """Load the given raw snapshots, oldest first, into the target model."""
+        raise NotImplementedError
+
+    def iter_records(self, raw_snapshots):
+        """
+        Yield the records of each raw snapshot in order.
+
+        Snapshots are streamed from a server-side cursor a few at a time, so memory
+        stays flat however long the raw history grows.
+        """
+
+        for raw_snapshot in raw_snapshots.only("data").iterator(
+            chunk_size=settings.ETL_ITERATOR_CHUNK_SIZE
+        ):
+            yield from raw_snapshot.data or []
+
+
+class VikingsShowService(BaseETLService):
+
+    raw_model = RawVikingsShow
+    source = "vikings_show"
+
+    def process(self, raw_shows, bulk=None):
         """Process raw data and save/update the VikingsShow model."""
 
-        for raw_show in RawVikingsShow.objects.all():
-            for record in raw_show.data:
-                if (character_name := record.get("character_name")) and (
-                    actor_url := record.get("href")
-                ):
-                    VikingsShow.objects.update_or_create(
+        if settings.ETL_BULK_UPSERT if bulk is None else bulk:
+            return self.bulk_process(raw_shows)
+
+        for record in self.iter_records(raw_shows):
+            if (character_name := record.get("character_name")) and (
+                actor_url := record.get("href")
+            ):
+                VikingsShow.objects.update_or_create(
+                    character_name=character_name,
+                    defaults={
+                        "actor_url": actor_url,
+                        "img_src": record.get("img_src"),
+                        "name": record.get("actor_name"),
+                        "character_description": record.get(
+                            "character_description"
+                        ),
+                    },
+                )
+
+    def bulk_process(self, raw_shows):
+        """Dedupe the raw records by character name, latest snapshot winning, and upsert them in bulk."""
+
+        shows = {}
+        for record in self.iter_records(raw_shows):
+            if (character_name := record.get("character_name")) and (
+                actor_url := record.get("href")
+            ):
+                shows[character_name] = VikingsShow(
+                    character_name=character_name,
+                    actor_url=actor_url,
+                    img_src=record.get("img_src"),
+                    name=record.get("actor_name"),
+                    character_description=record.get("character_description"),
+                )
+
+        bulk_upsert(
+            VikingsShow,
+            list(shows.values()),
+            update_fields=["actor_url", "img_src", "name", "character_description"],
+        )
+
+
+class NorsemenShowService(BaseETLService):
+
+    raw_model = RawNorsemenShow
+    source = "norsemen_show"
+
+    def process(self, raw_entries, bulk=None):
+        """Process raw data and save/update the Norsemen model."""
+
+        if settings.ETL_BULK_UPSERT if bulk is None else bulk:
+            return self.bulk_process(raw_entries)
+
+        for item in self.iter_records(raw_entries):
+            if character_name := item.get("character_name"):
+                with transaction.atomic():
+                    NorsemenShow.objects.update_or_create(
                         character_name=character_name,
                         defaults={
-                            "actor_url": actor_url,
-                            "img_src": record.get("img_src"),
-                            "name": record.get("actor_name"),
-                            "character_description": record.get(
-                                "character_description"
-                            ),
+                            "name": item.get("actor_name"),
+                            "description": item.get("description"),
                         },
                     )
 
+    def bulk_process(self, raw_entries):
+        """Dedupe the raw items by character name, latest snapshot winning, and upsert them in bulk."""
 
-class NorsemenShowService:
+        characters = {}
+        for item in self.iter_records(raw_entries):
+            if character_name := item.get("character_name"):
+                characters[character_name] = NorsemenShow(
+                    character_name=character_name,
+                    name=item.get("actor_name"),
+                    description=item.get("description"),
+                )
 
-    def handle(self):
-        """Process raw data and save/update the Norsemen model."""
+        bulk_upsert(
+            NorsemenShow,
+            list(characters.values()),
+            update_fields=["name", "description", "updated_at"],
+        )
 
-        for raw_entry in RawNorsemenShow.objects.all():
-            for item in raw_entry.data:
-                if character_name := item.get("character_name"):
-                    with transaction.atomic():
-                        NorsemenShow.objects.update_or_create(
-                            character_name=character_name,
-                            defaults={
-                                "name": item.get("actor_name"),
-                                "description": item.get("description"),
-                            },
-                        )
 
+CAREER_STAT_UPDATE_FIELDS = [
+    "games_played",
+    "games_started",
+    "touchdowns",
+    "attempts",
+    "average",
+    "fumbles",
+    "longest",
+    "receptions",
+    "yards",
+    "lost",
+    "updated_at",
+]
 
-class VikingsNFLService:
 
-    def handle(self):
+class VikingsNFLService(BaseETLService):
+
+    raw_model = RawVikingsNFL
+    source = "vikings_nfl"
+
+    def process(self, raw_shows):
         """Process raw data and save/update the VikingsNFL model along with career stats."""
 
-        for raw_show in RawVikingsNFL.objects.all():
-            for record in raw_show.data:
-                details = record.get("details", {})
+        for record in self.iter_records(raw_shows):
+            details = record.get("details", {})
 
-                player, created = VikingsNFL.objects.update_or_create(
-                    name=record.get("player_name", ""),
-                    defaults={
-                        "age": int(details.get("Age", 0)),
-                        "height": details.get("Height", ""),
-                        "weight": details.get("Weight", ""),
-                        "college": details.get("College", ""),
-                        "experience": details.get("Experience", ""),
-                        "profile_link": record.get("profile_link", ""),
-                        "biography_html": details.get("biography_html", ""),
-                        "image_src": record.get("image_src", ""),
-                    },
-                )
+            player, created = VikingsNFL.objects.update_or_create(
+                name=record.get("player_name", ""),
+                defaults={
+                    "age": int(details.get("Age", 0)),
+                    "height": details.get("Height", ""),
+                    "weight": details.get("Weight", ""),
+                    "college": details.get("College", ""),
+                    "experience": details.get("Experience", ""),
+                    "profile_link": record.get("profile_link", ""),
+                    "biography_html": details.get("biography_html", ""),
+                    "image_src": record.get("image_src", ""),
+                },
+            )
+
+            career_stats = details.get("career_stats") or {}
+            self.upsert_career_stats(
+                player,
+                [
+                    self.build_career_stat(player, season_key, season_data)
+                    for season_key, season_data in career_stats.items()
+                ],
+            )
 
-                career_stats = details.get("career_stats", {})
-                for season_key, season_data in career_stats.items():
-                    self.handle_season_data(player, season_key, season_data)
+    def upsert_career_stats(self, player, career_stats):
+        """Insert or update all of a player's seasons in one statement, keyed on (player, season, team)."""
 
-    def handle_season_data(self, player, season_key, season_data):
+        # The latest season can also be the 2021 one, so dedupe before the upsert.
+        unique_stats = {(stat.season, stat.team): stat for stat in career_stats}
+        CareerStat.objects.bulk_create(
+            list(unique_stats.values()),
+            update_conflicts=True,
+            unique_fields=["player", "season", "team"],
+            update_fields=CAREER_STAT_UPDATE_FIELDS,
+        )
+
+    def build_career_stat(self, player, season_key, season_data):
         """Handles the season data, ensuring missing or empty fields are properly set to None or defaults."""
 
         if season_data is None:
@@ -100,7 +286,7 @@ class VikingsNFLService:
                 "TEAM": None,
             }
 
-        CareerStat.objects.create(
+        return CareerStat(
             player=player,
             season=season_data.get("SEASON") or season_key,
             games_played=self.get_int(season_data.get("G")),
@@ -134,41 +320,237 @@ class VikingsNFLService:
         except (ValueError, TypeError):
             return None
 
+
+ETL_SERVICES = {
+    service.source: service for service in (VikingsShowService, NorsemenShowService, VikingsNFLService)
+}
+
+
+METRICS_WINDOWS = {
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+ROLLUP_COUNTERS = [
+    "total",
+    "successes",
+    "failures",
+    "execution_time_sum",
+    "retries_sum",
+    "cache_hits",
+    "bandwidth_saved",
+]
+
+
+def truncate_to_hour(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def get_rollup_key(log):
+    """
+    Return the task name and source a log is rolled up under.
+
+    Per-page tasks name their page after a colon ("Fetch URL: https://...")
+    and use its url as the source, so both are cut down to the task and the
+    host, keeping one rollup row per task and host each hour.
+    """
+    task_name = log.task_name.split(": ", 1)[0]
+    source = log.source or ""
+    return task_name, urlsplit(source).netloc or source
+
+
 class MetricsService:
 
     @staticmethod
-    def get_scraping_metrics():
-        # Total tasks
-        total_tasks = ScrapingLog.objects.count()
-        
-        # Success rate
-        successful_tasks = ScrapingLog.objects.filter(status="success").count()
-        success_rate = (successful_tasks / total_tasks) * 100 if total_tasks > 0 else 0
-        
-        # Failure rate
-        failed_tasks = ScrapingLog.objects.filter(status="failure").count()
-        failure_rate = (failed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
-        
-        # Average retries
-        average_retries = ScrapingLog.objects.aggregate(avg_retries=Avg("retries"))["avg_retries"] or 0
-        
-        # Average execution time
-        average_execution_time = ScrapingLog.objects.aggregate(avg_time=Avg("execution_time"))["avg_time"] or 0
-        
-        # Common errors
+    def record_logs(logs):
+        """Add freshly written ScrapingLog rows to the hourly rollups, keyed by get_rollup_key."""
+        rollups = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+        errors = {}
+        for log in logs:
+            hour = truncate_to_hour(log.timestamp)
+            rollup = rollups[(hour, *get_rollup_key(log))]
+            rollup["total"] += 1
+            rollup["successes"] += log.status == "success"
+            rollup["failures"] += log.status == "failure"
+            rollup["execution_time_sum"] += log.execution_time
+            rollup["retries_sum"] += log.retries
+            if log.cache_hit:
+                rollup["cache_hits"] += 1
+                rollup["bandwidth_saved"] += log.response_size or 0
+
+            if log.status == "failure" and log.error_message:
+                error_hash = hashlib.sha256(log.error_message.encode()).hexdigest()
+                error = errors.setdefault(
+                    (hour, error_hash),
+                    {"hour": hour, "error_hash": error_hash, "error_message": log.error_message, "count": 0},
+                )
+                error["count"] += 1
+
+        increment_counters(
+            ScrapingLogRollup,
+            [
+                {"hour": hour, "task_name": task_name, "source": source, **counters}
+                for (hour, task_name, source), counters in rollups.items()
+            ],
+            unique_fields=["hour", "task_name", "source"],
+            counter_fields=ROLLUP_COUNTERS,
+        )
+        increment_counters(
+            ScrapingErrorRollup,
+            list(errors.values()),
+            unique_fields=["hour", "error_hash"],
+            counter_fields=["count"],
+        )
+
+    @staticmethod
+    def get_scraping_metrics(window=None):
+        """
+        Summarize the scraping logs from the hourly rollups.
+
+        `window` is one of METRICS_WINDOWS; without it every rollup is counted.
+        """
+        rollups = ScrapingLogRollup.objects.all()
+        errors = ScrapingErrorRollup.objects.all()
+        if window:
+            since = truncate_to_hour(now() - METRICS_WINDOWS[window])
+            rollups = rollups.filter(hour__gte=since)
+            errors = errors.filter(hour__gte=since)
+
+        totals = rollups.aggregate(**{counter: Sum(counter) for counter in ROLLUP_COUNTERS})
+        totals = {counter: value or 0 for counter, value in totals.items()}
+        total_tasks = totals["total"]
+
+        def rate(value):
+            return value / total_tasks if total_tasks > 0 else 0
+
+        common_errors = (
+            errors.values("error_message")
+            .annotate(count=Sum("count"))
+            .order_by("-count")
+        )
+
+        return {
+            "total_tasks": total_tasks,
+            "success_rate": round(rate(totals["successes"]) * 100, 2),
+            "failure_rate": round(rate(totals["failures"]) * 100, 2),
+            "average_retries": round(rate(totals["retries_sum"]), 2),
+            "average_execution_time": round(rate(totals["execution_time_sum"]), 2),
+            "cache_hits": totals["cache_hits"],
+            "bandwidth_saved": totals["bandwidth_saved"],
+            "common_errors": list(common_errors),
+        }
+
+    @staticmethod
+    def get_live_scraping_metrics(window=None):
+        """
+        Summarize the scraping logs straight from ScrapingLog, bypassing the rollups.
+
+        The counters come from a single conditional-aggregation query and the
+        common errors from one GROUP BY, both served by the ScrapingLog indexes.
+        """
+        logs = ScrapingLog.objects.all()
+        if window:
+            logs = logs.filter(timestamp__gte=now() - METRICS_WINDOWS[window])
+
+        totals = logs.aggregate(
+            total_tasks=Count("id"),
+            successful_tasks=Count("id", filter=Q(status="success")),
+            failed_tasks=Count("id", filter=Q(status="failure")),
+            average_retries=Avg("retries"),
+            average_execution_time=Avg("execution_time"),
+            cache_hits=Count("id", filter=Q(cache_hit=True)),
+            bandwidth_saved=Sum("response_size", filter=Q(cache_hit=True)),
+        )
+        total_tasks = totals["total_tasks"]
+
+        def rate(value):
+            return value / total_tasks * 100 if total_tasks > 0 else 0
+
         common_errors = (
-            ScrapingLog.objects.filter(status="failure")
+            logs.filter(status="failure")
             .values("error_message")
             .annotate(count=Count("error_message"))
             .order_by("-count")
         )
 
-        # Return the calculated metrics
         return {
             "total_tasks": total_tasks,
-            "success_rate": round(success_rate, 2),
-            "failure_rate": round(failure_rate, 2),
-            "average_retries": round(average_retries, 2),
-            "average_execution_time": round(average_execution_time, 2),
+            "success_rate": round(rate(totals["successful_tasks"]), 2),
+            "failure_rate": round(rate(totals["failed_tasks"]), 2),
+            "average_retries": round(totals["average_retries"] or 0, 2),
+            "average_execution_time": round(totals["average_execution_time"] or 0, 2),
+            "cache_hits": totals["cache_hits"],
+            "bandwidth_saved": totals["bandwidth_saved"] or 0,
             "common_errors": list(common_errors),
-        }
\ No newline at end of file
+        }
+
+
+class ScrapingLogRetentionService:
+    """
+    Prune ScrapingLog rows past their per-status retention.
+
+    Every log is counted in the metrics rollups when it is written, so pruning
+    loses no metrics. Before deleting, hourly rollups older than
+    SCRAPING_LOG_ROLLUP_HOURLY_DAYS are compacted into one row per day. Expired
+    logs are deleted in chunks of SCRAPING_LOG_PRUNE_CHUNK_SIZE, each in its own
+    short transaction. When the table is partitioned by month (see the
+    partition_scraping_log command), fully expired partitions are dropped
+    instead of deleted row by row.
+    """
+
+    def handle(self):
+        current_time = now()
+        compacted = self.compact_rollups(
+            before=current_time - timedelta(days=settings.SCRAPING_LOG_ROLLUP_HOURLY_DAYS)
+        )
+
+        dropped_partitions = []
+        if partitions.is_partitioned():
+            partitions.ensure_partitions(current_time, settings.SCRAPING_LOG_PARTITION_MONTHS_AHEAD)
+            retention_days = settings.SCRAPING_LOG_RETENTION_DAYS.values()
+            # Partitions hold every status, so only drop what the longest retention has expired.
+            if all(retention_days):
+                dropped_partitions = partitions.drop_partitions_before(
+                    current_time - timedelta(days=max(retention_days))
+                )
+
+        deleted = self.delete_expired_logs(current_time)
+        return {
+            "compacted_rollups": compacted,
+            "dropped_partitions": dropped_partitions,
+            "deleted_logs": deleted,
+        }
+
+    def compact_rollups(self, before):
+        """Merge the hourly rollups older than `before` into one row per day; returns the rows merged."""
+        compacted = 0
+        for model, unique_fields, counter_fields, group_fields in (
+            (ScrapingLogRollup, ["hour", "task_name", "source"], ROLLUP_COUNTERS, ["task_name", "source"]),
+            (ScrapingErrorRollup, ["hour", "error_hash"], ["count"], ["error_hash", "error_message"]),
+        ):
+            hourly = model.objects.filter(hour__lt=truncate_to_hour(before)).exclude(hour__hour=0)
+            days = hourly.annotate(day=TruncDay("hour")).values_list("day", flat=True).distinct()
+            for day in sorted(days):
+                with transaction.atomic():
+                    rows = hourly.filter(hour__gte=day, hour__lt=day + timedelta(days=1))
+                    daily_rows = [
+                        {"hour": day, **row}
+                        for row in rows.values(*group_fields)
+                        .annotate(**{counter: Sum(counter) for counter in counter_fields})
+                        .order_by()
+                    ]
+                    compacted += rows.delete()[0]
+                    increment_counters(model, daily_rows, unique_fields, counter_fields)
+        return compacted
+
+    def delete_expired_logs(self, current_time):
+        """Delete logs past their status' retention in chunks; returns how many were deleted."""
+        deleted = 0
+        for status, days in settings.SCRAPING_LOG_RETENTION_DAYS.items():
+            if not days:
+                continue
+            expired = ScrapingLog.objects.filter(status=status, timestamp__lt=current_time - timedelta(days=days))
+            while chunk := list(expired.values_list("id", flat=True)[: settings.SCRAPING_LOG_PRUNE_CHUNK_SIZE]):
+                deleted += ScrapingLog.objects.filter(id__in=chunk).delete()[0]
+        return deleted
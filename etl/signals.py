@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from etl.cache import bump_data_version
+from etl.models import CareerStat, NorsemenShow, VikingsNFL, VikingsShow
+from etl.services import NorsemenShowService, VikingsNFLService, VikingsShowService
+
+# The ETL source whose API responses each model appears in.
+MODEL_SOURCES = {
+    VikingsShow: VikingsShowService.source,
+    NorsemenShow: NorsemenShowService.source,
+    VikingsNFL: VikingsNFLService.source,
+    CareerStat: VikingsNFLService.source,
+}
+
+
+def bump_model_data_version(sender, raw=False, **kwargs):
+    """Invalidate the cached responses and ETags of the source a saved or deleted row belongs to."""
+    if raw:
+        return
+    source = MODEL_SOURCES[sender]
+    transaction.on_commit(lambda: bump_data_version(source))
+
+
+for model in MODEL_SOURCES:
+    post_save.connect(bump_model_data_version, sender=model, dispatch_uid=f"bump_{model._meta.model_name}_version")
+    post_delete.connect(
+        bump_model_data_version, sender=model, dispatch_uid=f"bump_{model._meta.model_name}_deleted_version"
+    )
@@ -1,18 +1,146 @@
-from celery import shared_task
+import time
 
-from etl.services import VikingsShowService, NorsemenShowService
-from scraping.services import VikingsShowRawDataService, NorsemenShowRawDataService
+from celery import chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+
+from etl.services import (
+    ETL_SERVICES,
+    NorsemenShowService,
+    ScrapingLogRetentionService,
+    VikingsNFLService,
+    VikingsShowService,
+)
+from scraping.services import RAW_DATA_SERVICES
+
+RETRY_OPTIONS = {
+    "max_retries": settings.CELERY_TASK_DEFAULT_MAX_RETRIES,
+    "default_retry_delay": settings.CELERY_TASK_DEFAULT_RETRY_DELAY,
+}
+
+
+def get_task_options(source, step) -> dict:
+    """
+    Return the Celery options for one step (`index`, `page` or `load`) of a
+    source's scrape: its queue and time limits from SCRAPING_TASK_OPTIONS.
+    """
+    source_options = settings.SCRAPING_TASK_OPTIONS.get(source, {})
+    options = {}
+    if queue := source_options.get("queue"):
+        options["queue"] = queue
+    if time_limit := source_options.get(f"{step}_time_limit"):
+        options["soft_time_limit"] = time_limit
+        options["time_limit"] = time_limit + settings.CELERY_HARD_TIME_LIMIT_GRACE
+    return options
+
+
+def start_scrape(source):
+    return scrape_source.apply_async((source,), **get_task_options(source, "index")).id
 
 
 @shared_task
 def run_vikings_show_service():
-    """Run the VikingsShowService task."""
-    VikingsShowRawDataService().handle()
-    VikingsShowService().handle()
+    """Scrape the Vikings show and run the VikingsShowService."""
+    return start_scrape(VikingsShowService.source)
 
 
 @shared_task
 def run_norsemen_show_service():
-    """Run the NorsemenShowService task."""
-    NorsemenShowRawDataService().handle()
-    NorsemenShowService().handle()
+    """Scrape the Norsemen show and run the NorsemenShowService."""
+    return start_scrape(NorsemenShowService.source)
+
+
+@shared_task
+def run_vikings_nfl_service():
+    """Scrape the Vikings NFL roster and run the VikingsNFLService."""
+    return start_scrape(VikingsNFLService.source)
+
+
+@shared_task(bind=True, **RETRY_OPTIONS)
+def scrape_source(self, source):
+    """
+    Fetch the source's index page and fan its detail pages out to `scrape_page`
+    tasks, in a chord whose callback stores the raw snapshot and then runs the
+    ETL service. Pages are spread over every worker, and a failed page is
+    retried on its own. Every task of the chain goes to the source's queue with
+    its time limits, see get_task_options.
+
+    Pages are fetched one per task, so SCRAPING_ENGINE and the fetch engines,
+    which only fan pages out within one process, are used by seed.py alone.
+    """
+    started_at = time.time()
+    service = RAW_DATA_SERVICES[source]()
+    try:
+        index_data = service.fetch_index()
+        urls = service.get_detail_urls(index_data)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        service.log_scrape("failure", started_at, error_message=str(e))
+        raise
+    finally:
+        service.scrape_service.flush_logs()
+
+    load_options = get_task_options(source, "load")
+    callback = store_raw_data.s(source, index_data, started_at).set(**load_options)
+    callback |= run_etl_service.s(source).set(**load_options)
+    if not urls:
+        return callback.delay([]).id
+    page_options = get_task_options(source, "page")
+    return chord([scrape_page.s(source, url).set(**page_options) for url in urls])(callback).id
+
+
+@shared_task(bind=True, **RETRY_OPTIONS)
+def scrape_page(self, source, url):
+    """
+    Fetch and parse one detail page.
+
+    Returns {"data": ...}, or {"error": ...} once the retries are used up, so a
+    page that keeps failing is logged and left out instead of failing the chord.
+    A page that runs past its soft time limit is left out without a retry.
+    """
+    service = RAW_DATA_SERVICES[source]()
+    try:
+        return {"data": service.fetch_detail(url)}
+    except SoftTimeLimitExceeded:
+        # A retry would most likely run out of time again while the chord waits on it.
+        return {"error": f"Time limit exceeded fetching {url}"}
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        return {"error": str(e)}
+    finally:
+        service.scrape_service.flush_logs()
+
+
+@shared_task
+def store_raw_data(pages, source, index_data, started_at):
+    """Assemble the scraped pages into a raw snapshot and return whether it was stored."""
+    service = RAW_DATA_SERVICES[source]()
+    details = [Exception(page["error"]) if "error" in page else page["data"] for page in pages]
+    try:
+        changed = service.store(service.assemble(index_data, details))
+        service.log_scrape("success", started_at)
+        return changed
+    except Exception as e:
+        service.log_scrape("failure", started_at, error_message=str(e))
+        raise
+    finally:
+        service.scrape_service.flush_logs()
+
+
+@shared_task
+def run_etl_service(changed, source):
+    """
+    Run the source's ETL service even when this scrape stored no new snapshot:
+    an earlier load may have failed after its snapshot was saved, and the
+    watermark already makes a run without new snapshots a no-op.
+    """
+    ETL_SERVICES[source]().handle()
+    return changed
+
+
+@shared_task
+def prune_scraping_logs():
+    """Delete ScrapingLog rows past their retention and compact the old metrics rollups."""
+    return ScrapingLogRetentionService().handle()
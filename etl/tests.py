@@ -1,3 +1,1085 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from importlib import import_module
+from datetime import datetime, timedelta, timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from celery.exceptions import SoftTimeLimitExceeded
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
+from django.utils.timezone import now
+
+from etl import partitions
+from etl.cache import bump_data_version
+from etl.checks import (
+    check_career_stat_nulls_not_distinct,
+    check_partitioned_scraping_log_migrations,
+    get_pending_scraping_log_migrations,
+)
+from etl.models import (
+    CareerStat,
+    ETLWatermark,
+    NorsemenShow,
+    RawNorsemenShow,
+    RawVikingsNFL,
+    RawVikingsShow,
+    ScrapingErrorRollup,
+    ScrapingLog,
+    ScrapingLogRollup,
+    VikingsNFL,
+    VikingsShow,
+)
+from etl.services import (
+    ETL_SERVICES,
+    ROLLUP_COUNTERS,
+    BaseETLService,
+    NorsemenShowService,
+    ScrapingLogRetentionService,
+    VikingsNFLService,
+    VikingsShowService,
+    bulk_upsert,
+    increment_counters,
+)
+from etl.tasks import get_task_options, run_vikings_show_service, scrape_page
+from etl.views import NFLVikingsShowViewSet, NorsemenShowViewSet, VikingsShowViewSet
+from scraping.log_buffer import ScrapingLogBuffer
+from scraping.services import VIKINGS_SHOW_CAST_URL, ScrapeService
+from scraping_app.celery import app as celery_app
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def create_player(name="Justin Jefferson", **fields):
+    """Create a VikingsNFL player, filling the profile fields the test does not care about."""
+    defaults = {
+        "age": 25,
+        "height": "6-1",
+        "weight": "195",
+        "college": "LSU",
+        "experience": "4",
+        "profile_link": f"https://www.vikings.com/team/players-roster/{slugify(name)}/",
+    }
+    return VikingsNFL.objects.create(name=name, **{**defaults, **fields})
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_CACHE_TIMEOUT=0)
+class APITestCase(TestCase):
+    """Runs every test against an empty in-memory cache and fresh data versions."""
+
+    def setUp(self):
+        cache.clear()
+        for source in (VikingsShowService.source, NorsemenShowService.source, VikingsNFLService.source):
+            bump_data_version(source)
+
+
+class NFLVikingsShowViewSetTests(APITestCase):
+    """Query counts and career stat nesting for /api/vikings_nfl/."""
+
+    def create_players(self, count, seasons=5):
+        for index in range(count):
+            player = create_player(f"Player {index}")
+            CareerStat.objects.bulk_create(
+                CareerStat(player=player, season=str(2023 - offset), team="MIN", games_played=17)
+                for offset in range(seasons)
+            )
+
+    def test_page_query_count_does_not_grow_with_players(self):
+        self.create_players(2)
+        # The data version, page count, players, and one prefetch for every player's career stats.
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/vikings_nfl/")
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        self.create_players(10)
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/vikings_nfl/")
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_career_stats_are_newest_first(self):
+        self.create_players(1)
+        response = self.client.get("/api/vikings_nfl/")
+        seasons = [stat["season"] for stat in response.json()["results"][0]["career_stats"]]
+        self.assertEqual(seasons, ["2023", "2022", "2021", "2020", "2019"])
+
+    @override_settings(API_CAREER_STATS_LIMIT=3)
+    def test_career_stats_are_capped_per_player(self):
+        self.create_players(2)
+        response = self.client.get("/api/vikings_nfl/")
+        for result in response.json()["results"]:
+            seasons = [stat["season"] for stat in result["career_stats"]]
+            self.assertEqual(seasons, ["2023", "2022", "2021"])
+
+    def test_seasons_limits_career_stats_to_the_latest_seasons(self):
+        self.create_players(3)
+        player = VikingsNFL.objects.first()
+        # A mid-season trade gives the latest season two rows.
+        CareerStat.objects.create(player=player, season="2023", team="DET")
+
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/vikings_nfl/?seasons=2")
+        for result in response.json()["results"]:
+            seasons = {stat["season"] for stat in result["career_stats"]}
+            self.assertEqual(seasons, {"2023", "2022"})
+        traded = next(result for result in response.json()["results"] if result["id"] == str(player.id))
+        self.assertEqual(len(traded["career_stats"]), 3)
+
+    def test_seasons_must_be_a_positive_number(self):
+        self.assertEqual(self.client.get("/api/vikings_nfl/?seasons=0").status_code, 400)
+        self.assertEqual(self.client.get("/api/vikings_nfl/?seasons=latest").status_code, 400)
+
+
+@override_settings(API_CACHE_TIMEOUT=60)
+class ResponseCacheTests(APITestCase):
+    """The API response cache and its invalidation by the ETL services."""
+
+    def load_vikings_show(self, characters):
+        RawVikingsShow.objects.create(
+            data=[
+                {
+                    "href": f"/shows/vikings/cast/{name.lower()}",
+                    "img_src": f"https://www.history.com/images/{name.lower()}.jpg",
+                    "character_name": name,
+                    "actor_name": f"Actor of {name}",
+                    "character_description": f"{name} of Kattegat.",
+                }
+                for name in characters
+            ]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            VikingsShowService().handle()
+
+    def test_repeated_request_is_served_from_the_cache(self):
+        self.load_vikings_show(["Ragnar", "Lagertha"])
+        first = self.client.get("/api/vikings/?ordering=character_name&search=a")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/vikings/?search=a&ordering=character_name")
+        self.assertEqual(first.json(), second.json())
+
+    def test_etl_load_invalidates_the_cached_responses(self):
+        self.load_vikings_show(["Ragnar"])
+        self.assertEqual(self.client.get("/api/vikings/").json()["count"], 1)
+
+        self.load_vikings_show(["Ragnar", "Bjorn"])
+        self.assertEqual(self.client.get("/api/vikings/").json()["count"], 2)
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.client.get("/api/vikings/00000000-0000-0000-0000-000000000000/").status_code, 404)
+        self.load_vikings_show(["Ragnar"])
+        character = self.client.get("/api/vikings/").json()["results"][0]
+        self.assertEqual(self.client.get(f"/api/vikings/{character['id']}/").status_code, 200)
+
+    def test_matching_etag_gets_a_304_without_queries(self):
+        self.load_vikings_show(["Ragnar"])
+        response = self.client.get("/api/vikings/?search=Ragnar")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get("/api/vikings/?search=Ragnar", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+
+        not_modified = self.client.get("/api/vikings/?search=Ragnar", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_etl_load_changes_the_etag(self):
+        self.load_vikings_show(["Ragnar"])
+        etag = self.client.get("/api/vikings/")["ETag"]
+        self.assertNotEqual(self.client.get("/api/vikings/?page=1")["ETag"], etag)
+
+        self.load_vikings_show(["Ragnar", "Bjorn"])
+        response = self.client.get("/api/vikings/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_orm_save_changes_the_etag(self):
+        self.load_vikings_show(["Ragnar"])
+        for timeout in [60, 0]:
+            with self.subTest(API_CACHE_TIMEOUT=timeout), override_settings(API_CACHE_TIMEOUT=timeout):
+                etag = self.client.get("/api/vikings/")["ETag"]
+                with self.captureOnCommitCallbacks(execute=True):
+                    VikingsShow.objects.update_or_create(
+                        character_name="Ragnar", defaults={"name": f"Travis Fimmel {timeout}"}
+                    )
+                response = self.client.get("/api/vikings/", HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+                self.assertEqual(response.json()["results"][0]["name"], f"Travis Fimmel {timeout}")
+
+    def test_model_edit_invalidates_the_cached_responses(self):
+        self.load_vikings_show(["Ragnar"])
+        self.assertEqual(self.client.get("/api/vikings/").json()["results"][0]["name"], "Actor of Ragnar")
+
+        # As the admin would save it.
+        with self.captureOnCommitCallbacks(execute=True):
+            character = VikingsShow.objects.get()
+            character.name = "Travis Fimmel"
+            character.save()
+        self.assertEqual(self.client.get("/api/vikings/").json()["results"][0]["name"], "Travis Fimmel")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            character.delete()
+        self.assertEqual(self.client.get("/api/vikings/").json()["count"], 0)
+
+    def test_unreachable_cache_falls_back_to_the_watermark(self):
+        self.load_vikings_show(["Ragnar"])
+        with mock.patch("etl.cache.cache") as unreachable_cache:
+            for method in (unreachable_cache.get, unreachable_cache.set, unreachable_cache.add):
+                method.side_effect = ConnectionError("Connection refused")
+            with self.assertLogs("etl.cache", "WARNING"):
+                response = self.client.get("/api/vikings/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+        self.assertEqual(response["ETag"], self.client.get("/api/vikings/")["ETag"])
+
+    @override_settings(API_CACHE_TIMEOUT=0)
+    def test_disabled_cache_is_never_read(self):
+        self.load_vikings_show(["Ragnar"])
+        with mock.patch("etl.cache.cache") as disabled_cache:
+            response = self.client.get("/api/vikings/")
+        self.assertEqual(response.json()["count"], 1)
+        self.assertIn("ETag", response)
+        self.assertEqual(disabled_cache.mock_calls, [])
+
+
+@override_settings(API_MAX_PAGE_SIZE=4)
+class CursorPaginationTests(APITestCase):
+    """Opt-in keyset pagination on the show viewsets."""
+
+    def setUp(self):
+        super().setUp()
+        # Duplicate names, so the id tiebreaker decides the order within them.
+        for index in range(9):
+            create_player(
+                f"Player {index // 2}", profile_link=f"https://www.vikings.com/team/players-roster/player-{index}/"
+            )
+
+    def test_walks_every_row_once_in_key_order(self):
+        url, ids = "/api/vikings_nfl/?pagination=cursor&page_size=2", []
+        while url:
+            # The data version, players and their career stats; no COUNT(*).
+            with self.assertNumQueries(3):
+                page = self.client.get(url).json()
+            self.assertNotIn("count", page)
+            ids += [player["id"] for player in page["results"]]
+            url = page["next"]
+
+        expected = VikingsNFL.objects.order_by("name", "id").values_list("id", flat=True)
+        self.assertEqual(ids, [str(player_id) for player_id in expected])
+
+    def test_unique_key_needs_no_id_tiebreaker(self):
+        for character_name in ["Lagertha", "Ragnar Lothbrok", "Bjorn Ironside"]:
+            VikingsShow.objects.create(character_name=character_name)
+        url, names = "/api/vikings/?pagination=cursor&page_size=2", []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(url).json()
+            self.assertTrue(queries.captured_queries[-1]["sql"].endswith('ORDER BY "etl_vikingsshow"."character_name" ASC LIMIT 3'))
+            names += [row["character_name"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(names, ["Bjorn Ironside", "Lagertha", "Ragnar Lothbrok"])
+
+    def test_page_size_is_capped(self):
+        page = self.client.get("/api/vikings_nfl/?pagination=cursor&page_size=100").json()
+        self.assertEqual(len(page["results"]), 4)
+
+    def test_page_numbers_stay_the_default(self):
+        page = self.client.get("/api/vikings_nfl/").json()
+        self.assertEqual(page["count"], 9)
+
+
+class FullTextSearchTests(APITestCase):
+    """Ranked full-text and fuzzy search on /api/vikings/."""
+
+    def setUp(self):
+        super().setUp()
+        for character_name, name, description in [
+            ("Ragnar Lothbrok", "Travis Fimmel", "A farmer who becomes king of Kattegat."),
+            ("Lagertha", "Katheryn Winnick", "A shieldmaiden who fights beside Ragnar."),
+            ("Floki", "Gustaf Skarsgard", "A boat builder devoted to the gods."),
+        ]:
+            VikingsShow.objects.create(
+                actor_url=f"https://www.history.com/{character_name}",
+                character_name=character_name,
+                name=name,
+                character_description=description,
+            )
+
+    def search(self, text):
+        response = self.client.get("/api/vikings/", {"search": text})
+        return [character["character_name"] for character in response.json()["results"]]
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text search needs PostgreSQL.")
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search("Ragnar"), ["Ragnar Lothbrok", "Lagertha"])
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text search needs PostgreSQL.")
+    def test_misspelled_names_match_by_trigram(self):
+        self.assertEqual(self.search("Lagerta"), ["Lagertha"])
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text search needs PostgreSQL.")
+    def test_web_search_syntax(self):
+        self.assertEqual(self.search("ragnar -king"), ["Lagertha"])
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text search needs PostgreSQL.")
+    def test_client_ordering_overrides_relevance(self):
+        response = self.client.get("/api/vikings/", {"search": "Ragnar", "ordering": "character_name"})
+        self.assertEqual([c["character_name"] for c in response.json()["results"]], ["Lagertha", "Ragnar Lothbrok"])
+
+    def test_other_databases_fall_back_to_ilike(self):
+        with mock.patch("etl.filters.connections") as connections:
+            connections.__getitem__.return_value.vendor = "sqlite"
+            self.assertEqual(sorted(self.search("shieldmaiden")), ["Lagertha"])
+
+    def test_search_fields_are_the_search_vector_and_substring_fields(self):
+        search_vector_columns = import_module("etl.migrations.0016_full_text_search").SEARCH_VECTOR_COLUMNS
+        for viewset in (VikingsShowViewSet, NorsemenShowViewSet, NFLVikingsShowViewSet):
+            with self.subTest(viewset=viewset.__name__):
+                table = viewset.queryset.model._meta.db_table
+                self.assertEqual(
+                    sorted(viewset.search_fields),
+                    sorted([column for column, _ in search_vector_columns[table]] + viewset.search_substring_fields),
+                )
+
+    def test_both_backends_search_urls_and_ages(self):
+        create_player(age=31, college="LSU")
+        searches = [
+            ("/api/vikings/", "history.com/Lagertha", "character_name", ["Lagertha"]),
+            ("/api/vikings_nfl/", "players-roster/justin", "name", ["Justin Jefferson"]),
+            ("/api/vikings_nfl/", "31", "name", ["Justin Jefferson"]),
+            ("/api/vikings_nfl/", "LSU", "name", ["Justin Jefferson"]),
+        ]
+        for path, text, field, expected in searches:
+            with self.subTest(path=path, search=text):
+                response = self.client.get(path, {"search": text})
+                self.assertEqual([row[field] for row in response.json()["results"]], expected)
+                with mock.patch("etl.filters.connections") as connections:
+                    connections.__getitem__.return_value.vendor = "sqlite"
+                    response = self.client.get(path, {"search": text})
+                self.assertEqual([row[field] for row in response.json()["results"]], expected)
+
+
+class SparseFieldsetTests(APITestCase):
+    """?fields= / ?exclude= and the lightweight list responses."""
+
+    def setUp(self):
+        super().setUp()
+        self.player = create_player(
+            biography_html="<p>" + "Drafted in the first round. " * 200 + "</p>",
+            image_src="https://static.www.nfl.com/justin-jefferson.png",
+        )
+        CareerStat.objects.create(player=self.player, season="2023", team="MIN")
+
+    def test_list_leaves_out_heavy_columns_that_detail_keeps(self):
+        listed = self.client.get("/api/vikings_nfl/").json()["results"][0]
+        self.assertNotIn("biography_html", listed)
+        self.assertIn("career_stats", listed)
+
+        detail = self.client.get(f"/api/vikings_nfl/{self.player.id}/").json()
+        self.assertTrue(detail["biography_html"].startswith("<p>"))
+
+    def test_fields_narrows_the_output_and_the_queries(self):
+        # The data version, page count and players only: career stats are not prefetched.
+        with self.assertNumQueries(3) as queries:
+            response = self.client.get("/api/vikings_nfl/?fields=name,image_src")
+        self.assertEqual(response.json()["results"], [{"name": "Justin Jefferson", "image_src": self.player.image_src}])
+        self.assertNotIn("biography_html", queries.captured_queries[-1]["sql"])
+
+    def test_fields_can_ask_for_list_excluded_columns(self):
+        listed = self.client.get("/api/vikings_nfl/?fields=name,biography_html").json()["results"][0]
+        self.assertEqual(set(listed), {"name", "biography_html"})
+
+    def test_list_keeps_descriptions_unless_excluded(self):
+        VikingsShow.objects.create(character_name="Lagertha", character_description="Shieldmaiden.")
+        NorsemenShow.objects.create(character_name="Orm", description="A chieftain's brother.")
+        for path, field, value in [
+            ("/api/vikings/", "character_description", "Shieldmaiden."),
+            ("/api/norsemen/", "description", "A chieftain's brother."),
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).json()["results"][0][field], value)
+                listed = self.client.get(path, {"exclude": field}).json()["results"][0]
+                self.assertNotIn(field, listed)
+                self.assertIn("character_name", listed)
+
+    def test_exclude_drops_fields(self):
+        listed = self.client.get("/api/vikings_nfl/?exclude=career_stats,profile_link").json()["results"][0]
+        self.assertNotIn("career_stats", listed)
+        self.assertNotIn("profile_link", listed)
+        self.assertIn("name", listed)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/api/vikings_nfl/?fields=name,salary")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("salary", response.json()["fields"])
+
+    def test_cursor_pagination_loads_its_ordering_columns(self):
+        create_player("Sam Darnold")
+        with self.assertNumQueries(2):
+            page = self.client.get("/api/vikings_nfl/?pagination=cursor&page_size=1&fields=image_src").json()
+        self.assertIsNotNone(page["next"])
+        self.assertEqual(len(self.client.get(page["next"]).json()["results"]), 1)
+
+
+@override_settings(API_EXPORT_CHUNK_SIZE=1)
+class ExportTests(APITestCase):
+    """Streaming NDJSON and CSV exports."""
+
+    def setUp(self):
+        super().setUp()
+        for character_name, name in [("Ragnar Lothbrok", "Travis Fimmel"), ("Lagertha", "Katheryn Winnick")]:
+            VikingsShow.objects.create(
+                actor_url=f"https://www.history.com/{character_name}",
+                character_name=character_name,
+                name=name,
+                character_description=f"{character_name} of Kattegat.",
+            )
+
+    def export(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson_streams_every_row_with_heavy_columns(self):
+        response, body = self.export("/api/vikings/export/")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertIn('filename="vikings_show.ndjson"', response["Content-Disposition"])
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["character_name"] for row in rows], ["Lagertha", "Ragnar Lothbrok"])
+        self.assertEqual(rows[0]["character_description"], "Lagertha of Kattegat.")
+
+    def test_csv_honours_filters_and_fields(self):
+        response, body = self.export(
+            "/api/vikings/export/", format="csv", name="Travis Fimmel", fields="character_name,name"
+        )
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            list(csv.DictReader(io.StringIO(body))), [{"character_name": "Ragnar Lothbrok", "name": "Travis Fimmel"}]
+        )
+
+    def test_search_is_applied(self):
+        # An exact substring, so it matches on PostgreSQL and on the ILIKE fallback alike.
+        _, body = self.export("/api/vikings/export/", search="Lagertha")
+        self.assertEqual([json.loads(line)["name"] for line in body.splitlines()], ["Katheryn Winnick"])
+
+    def test_nested_career_stats_are_json_in_csv(self):
+        CareerStat.objects.create(player=create_player(), season="2023", team="MIN")
+        _, body = self.export("/api/vikings_nfl/export/", format="csv", fields="name,career_stats")
+        (row,) = csv.DictReader(io.StringIO(body))
+        self.assertEqual([stat["season"] for stat in json.loads(row["career_stats"])], ["2023"])
+
+    def test_unchanged_export_is_not_modified(self):
+        response, _ = self.export("/api/vikings/export/", format="csv")
+        revalidated = self.client.get("/api/vikings/export/?format=csv", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        # The JSON list of the same query has a different ETag.
+        self.assertNotEqual(self.client.get("/api/vikings/")["ETag"], self.client.get("/api/vikings/export/")["ETag"])
+
+
+class ScrapeTaskTests(TestCase):
+    """The per-page scrape fan-out and its chord, run eagerly."""
+
+    CAST = [{"href": "/ragnar", "img_src": "ragnar.png"}, {"href": "/floki", "img_src": "floki.png"}]
+
+    def setUp(self):
+        celery_app.conf.update(task_always_eager=True, task_eager_propagates=True)
+        self.addCleanup(celery_app.conf.update, task_always_eager=False, task_eager_propagates=False)
+        # A failing page gets one attempt instead of being retried.
+        patcher = mock.patch.object(scrape_page, "max_retries", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch_parsed(self, url, parse):
+        if url == VIKINGS_SHOW_CAST_URL:
+            return [dict(cast) for cast in self.CAST]
+        if url.endswith("/floki"):
+            raise Exception("Error fetching floki")
+        return {"character_name": "Ragnar Lothbrok", "actor_name": "Travis Fimmel", "character_description": "King."}
+
+    def test_chord_stores_snapshot_and_runs_etl(self):
+        with mock.patch.object(ScrapeService, "fetch_parsed", side_effect=self.fetch_parsed) as fetch_parsed:
+            run_vikings_show_service.delay()
+
+        self.assertEqual(
+            [call.args[0] for call in fetch_parsed.call_args_list],
+            [VIKINGS_SHOW_CAST_URL, "https://www.history.com/ragnar", "https://www.history.com/floki"],
+        )
+        (snapshot,) = RawVikingsShow.objects.all()
+        self.assertEqual(snapshot.data[0]["actor_name"], "Travis Fimmel")
+        self.assertNotIn("actor_name", snapshot.data[1])
+        self.assertEqual(VikingsShow.objects.get().name, "Travis Fimmel")
+        self.assertEqual(
+            dict(ScrapingLog.objects.values_list("task_name", "status")),
+            {"Scrape Vikings Show Data": "success", "Parse Character Page: /floki": "failure"},
+        )
+
+    def test_failed_load_is_picked_up_by_the_next_scrape(self):
+        with mock.patch.object(ScrapeService, "fetch_parsed", side_effect=self.fetch_parsed):
+            with mock.patch.object(VikingsShowService, "process", side_effect=RuntimeError("Load killed")):
+                with self.assertRaises(RuntimeError):
+                    run_vikings_show_service.delay()
+            self.assertFalse(VikingsShow.objects.exists())
+
+            # The snapshot is unchanged, so it is not stored again, but the ETL still loads it.
+            run_vikings_show_service.delay()
+            self.assertEqual(RawVikingsShow.objects.count(), 1)
+            self.assertEqual(VikingsShow.objects.get().name, "Travis Fimmel")
+
+            # Once it is loaded, the watermark turns the ETL into a no-op.
+            with mock.patch.object(VikingsShowService, "process") as process:
+                run_vikings_show_service.delay()
+            process.assert_not_called()
+
+    def test_page_past_its_soft_time_limit_is_not_retried(self):
+        url = "https://www.history.com/ragnar"
+        with mock.patch.object(scrape_page, "max_retries", 1):
+            with mock.patch.object(ScrapeService, "fetch_parsed", side_effect=SoftTimeLimitExceeded()) as fetch_parsed:
+                result = scrape_page.delay(VikingsShowService.source, url).get()
+        self.assertEqual(result, {"error": f"Time limit exceeded fetching {url}"})
+        self.assertEqual(fetch_parsed.call_count, 1)
+
+    @override_settings(
+        SCRAPING_TASK_OPTIONS={"vikings_nfl": {"queue": "nfl", "page_time_limit": 60}},
+        CELERY_HARD_TIME_LIMIT_GRACE=30,
+    )
+    def test_task_options_route_nfl_to_its_queue(self):
+        self.assertEqual(
+            get_task_options(VikingsNFLService.source, "page"),
+            {"queue": "nfl", "soft_time_limit": 60, "time_limit": 90},
+        )
+        self.assertEqual(get_task_options(VikingsNFLService.source, "load"), {"queue": "nfl"})
+        self.assertEqual(get_task_options(VikingsShowService.source, "page"), {})
+
+
+class ScrapingMetricsTests(TestCase):
+    """/metrics/ from the hourly rollups against the live aggregation over ScrapingLog."""
+
+    ROSTER_URL = "https://www.vikings.com/team/players-roster/"
+
+    def setUp(self):
+        current_hour = now().replace(minute=30, second=0, microsecond=0)
+        self.hours = [current_hour - timedelta(hours=3), current_hour - timedelta(hours=1)]
+        log_buffer = ScrapingLogBuffer(max_size=1000, max_age=3600)
+        # Two flushes hit the same rollup rows, so the second one adds to the stored counters.
+        for flush in range(2):
+            for hour in self.hours:
+                self.log(log_buffer, hour, "success", execution_time=0.5, cache_hit=True, response_size=1000)
+                self.log(log_buffer, hour, "success", execution_time=1.5, retries=1)
+                self.log(log_buffer, hour, "failure", execution_time=2.0, retries=3, error_message="Timed out")
+            self.log(log_buffer, self.hours[1], "failure", execution_time=1.0, error_message="404 Not Found")
+            # Outside the 24h window.
+            self.log(log_buffer, now() - timedelta(days=3), "failure", execution_time=4.0, error_message="Timed out")
+            log_buffer.flush()
+
+    def log(self, log_buffer, timestamp, status, **fields):
+        log_buffer.add(
+            task_name=f"Fetch URL: {self.ROSTER_URL}",
+            status=status,
+            source=self.ROSTER_URL,
+            timestamp=timestamp,
+            **fields,
+        )
+
+    def test_rollups_add_up_the_logs(self):
+        rollup = ScrapingLogRollup.objects.get(hour=self.hours[0].replace(minute=0))
+        self.assertEqual(
+            (rollup.total, rollup.successes, rollup.failures, rollup.retries_sum, rollup.cache_hits),
+            (6, 4, 2, 8, 2),
+        )
+        self.assertEqual((rollup.execution_time_sum, rollup.bandwidth_saved), (8.0, 2000))
+        self.assertEqual(ScrapingLogRollup.objects.count(), 3)
+        self.assertEqual(
+            ScrapingErrorRollup.objects.get(hour=self.hours[1].replace(minute=0), error_message="Timed out").count, 2
+        )
+
+    def test_rollup_metrics_match_the_live_metrics(self):
+        for window in ["", "24h", "30d"]:
+            with self.subTest(window=window):
+                metrics = self.client.get("/metrics/", {"window": window}).json()
+                self.assertEqual(metrics, self.client.get("/metrics/", {"window": window, "live": "true"}).json())
+                self.assertEqual(metrics["total_tasks"], ScrapingLog.objects.count() - (2 if window == "24h" else 0))
+
+        metrics = self.client.get("/metrics/?window=24h").json()
+        self.assertEqual(
+            metrics["common_errors"],
+            [{"error_message": "Timed out", "count": 4}, {"error_message": "404 Not Found", "count": 2}],
+        )
+
+
+    def test_pages_share_their_task_and_host_rollup(self):
+        hour = now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+        log_buffer = ScrapingLogBuffer(max_size=1000, max_age=3600)
+        for character in ["ragnar", "floki", "lagertha"]:
+            log_buffer.add(
+                task_name=f"Fetch URL: https://www.history.com/shows/vikings/cast/{character}",
+                status="success",
+                source=f"https://www.history.com/shows/vikings/cast/{character}",
+                timestamp=hour,
+                execution_time=1.0,
+            )
+        log_buffer.flush()
+        rollup = ScrapingLogRollup.objects.get(hour=hour)
+        self.assertEqual((rollup.task_name, rollup.source, rollup.total), ("Fetch URL", "www.history.com", 3))
+
+    @override_settings(ETL_BULK_BATCH_SIZE=2)
+    def test_counters_are_written_in_batches(self):
+        ScrapingLogRollup.objects.all().delete()
+        hour = now().replace(minute=0, second=0, microsecond=0)
+        rows = [
+            {
+                "hour": hour - timedelta(hours=offset),
+                "task_name": "Fetch URL",
+                "source": "www.vikings.com",
+                **dict.fromkeys(ROLLUP_COUNTERS, 0),
+                "total": 1,
+            }
+            for offset in range(5)
+        ]
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                increment_counters(ScrapingLogRollup, rows, ["hour", "task_name", "source"], ROLLUP_COUNTERS)
+            self.assertEqual(len(queries), 3)
+        self.assertEqual(list(ScrapingLogRollup.objects.values_list("total", flat=True).distinct()), [2])
+        self.assertEqual(ScrapingLogRollup.objects.count(), 5)
+
+class ScrapingLogRetentionTests(TestCase):
+    """Rollup compaction and per-status log deletion of the retention job."""
+
+    def add_rollup(self, hour, total):
+        return ScrapingLogRollup.objects.create(hour=hour, task_name="Scrape Vikings Show Data", total=total)
+
+    def add_log(self, status, age):
+        return ScrapingLog.objects.create(
+            task_name="Scrape Vikings Show Data", status=status, execution_time=1.0, timestamp=self.now - age
+        )
+
+    def setUp(self):
+        self.now = datetime(2024, 3, 10, 12, 30, tzinfo=timezone.utc)
+
+    def test_compacts_hourly_rollups_into_their_day(self):
+        day = datetime(2024, 3, 9, tzinfo=timezone.utc)
+        self.add_rollup(day, 1)  # Already compacted: the next run adds to it.
+        self.add_rollup(day + timedelta(hours=5), 2)
+        self.add_rollup(day + timedelta(hours=23), 3)
+        self.add_rollup(day + timedelta(days=1, hours=11), 4)
+        self.add_rollup(day + timedelta(days=1, hours=12), 5)  # The hour `before` falls in stays hourly.
+        ScrapingErrorRollup.objects.create(
+            hour=day + timedelta(hours=5), error_hash="timeout", error_message="Timed out", count=2
+        )
+        ScrapingErrorRollup.objects.create(
+            hour=day + timedelta(hours=6), error_hash="timeout", error_message="Timed out", count=3
+        )
+
+        service = ScrapingLogRetentionService()
+        self.assertEqual(service.compact_rollups(before=self.now), 5)
+        self.assertEqual(
+            list(ScrapingLogRollup.objects.order_by("hour").values_list("hour", "total")),
+            [(day, 6), (day + timedelta(days=1), 4), (day + timedelta(days=1, hours=12), 5)],
+        )
+        self.assertEqual(list(ScrapingErrorRollup.objects.values_list("hour", "count")), [(day, 5)])
+        # Daily rows sit at 00:00, which the next runs leave alone.
+        self.assertEqual(service.compact_rollups(before=self.now), 0)
+        self.assertEqual(ScrapingLogRollup.objects.get(hour=day).total, 6)
+
+    @override_settings(SCRAPING_LOG_RETENTION_DAYS={"success": 30, "failure": 90}, SCRAPING_LOG_PRUNE_CHUNK_SIZE=2)
+    def test_deletes_logs_past_their_status_retention_in_chunks(self):
+        kept = [
+            self.add_log("success", timedelta(days=30) - timedelta(seconds=1)),
+            self.add_log("failure", timedelta(days=30, seconds=1)),
+            self.add_log("failure", timedelta(days=90) - timedelta(seconds=1)),
+        ]
+        for age in range(5):
+            self.add_log("success", timedelta(days=30 + age, seconds=1))
+        self.add_log("failure", timedelta(days=90, seconds=1))
+
+        with mock.patch.object(ScrapingLog.objects, "filter", wraps=ScrapingLog.objects.filter) as log_filter:
+            self.assertEqual(ScrapingLogRetentionService().delete_expired_logs(self.now), 6)
+        chunks = [call.kwargs["id__in"] for call in log_filter.call_args_list if "id__in" in call.kwargs]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1, 1])
+        self.assertEqual(set(ScrapingLog.objects.values_list("id", flat=True)), {log.id for log in kept})
+
+    @override_settings(SCRAPING_LOG_RETENTION_DAYS={"success": 0, "failure": 90})
+    def test_zero_retention_keeps_logs_forever(self):
+        self.add_log("success", timedelta(days=3650))
+        self.add_log("failure", timedelta(days=91))
+        self.assertEqual(ScrapingLogRetentionService().delete_expired_logs(self.now), 1)
+        self.assertEqual(ScrapingLog.objects.get().status, "success")
+
+    @override_settings(SCRAPING_LOG_RETENTION_DAYS={"success": 30, "failure": 90}, SCRAPING_LOG_ROLLUP_HOURLY_DAYS=31)
+    def test_handle(self):
+        self.add_rollup(self.now - timedelta(days=40), 1)
+        self.add_log("success", timedelta(days=31))
+        with mock.patch("etl.services.now", return_value=self.now):
+            result = ScrapingLogRetentionService().handle()
+        self.assertEqual(result, {"compacted_rollups": 1, "dropped_partitions": [], "deleted_logs": 1})
+
+
+@skipUnless(connection.vendor == "postgresql", "ScrapingLog partitioning needs PostgreSQL.")
+class ScrapingLogPartitionTests(TestCase):
+    """Monthly partitions of ScrapingLog, converted inside the test transaction."""
+
+    def setUp(self):
+        self.now = datetime(2024, 3, 10, 12, 30, tzinfo=timezone.utc)
+        ScrapingLog.objects.create(
+            task_name="Scrape Vikings Show Data",
+            status="success",
+            execution_time=1.0,
+            timestamp=datetime(2024, 1, 20, tzinfo=timezone.utc),
+        )
+        partitions.partition_scraping_log(self.now, months_ahead=1)
+
+    def test_month_start(self):
+        self.assertEqual(partitions.month_start(self.now), datetime(2024, 3, 1, tzinfo=timezone.utc))
+        self.assertEqual(partitions.month_start(self.now, 10), datetime(2025, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(partitions.month_start(self.now, -3), datetime(2023, 12, 1, tzinfo=timezone.utc))
+
+    def test_partitions_from_the_oldest_log_to_months_ahead(self):
+        self.assertTrue(partitions.is_partitioned())
+        self.assertEqual(
+            partitions.get_partitions(),
+            {
+                datetime(2024, month, 1, tzinfo=timezone.utc): f"etl_scrapinglog_p2024{month:02}"
+                for month in range(1, 5)
+            },
+        )
+        # The default partition is not a month and is never dropped.
+        self.assertEqual(partitions.PARTITION_NAME.search("etl_scrapinglog_default"), None)
+        log = ScrapingLog.objects.create(task_name="Fetch URL", status="success", execution_time=1.0)
+        self.assertGreater(log.id, ScrapingLog.objects.order_by("id").first().id)
+
+    def test_ensure_and_drop_partitions(self):
+        partitions.ensure_partitions(datetime(2024, 5, 31, tzinfo=timezone.utc), months_ahead=2)
+        self.assertEqual(len(partitions.get_partitions()), 7)
+
+        # February ends on 2024-03-01, so only partitions ending on or before the cutoff go.
+        dropped = partitions.drop_partitions_before(datetime(2024, 3, 1, tzinfo=timezone.utc))
+        self.assertEqual(dropped, ["etl_scrapinglog_p202401", "etl_scrapinglog_p202402"])
+        self.assertEqual(min(partitions.get_partitions()), datetime(2024, 3, 1, tzinfo=timezone.utc))
+        self.assertFalse(ScrapingLog.objects.exists())
+
+    def test_ensure_partitions_moves_rows_out_of_the_default_partition(self):
+        # Past the months created ahead, so it lands in the default partition.
+        log = ScrapingLog.objects.create(
+            task_name="Fetch URL",
+            status="success",
+            execution_time=1.0,
+            timestamp=datetime(2024, 6, 15, tzinfo=timezone.utc),
+        )
+        partitions.ensure_partitions(datetime(2024, 5, 10, tzinfo=timezone.utc), months_ahead=1)
+
+        self.assertIn(datetime(2024, 6, 1, tzinfo=timezone.utc), partitions.get_partitions())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM etl_scrapinglog_p202406")
+            self.assertEqual(cursor.fetchall(), [(log.id,)])
+            cursor.execute("SELECT COUNT(*) FROM etl_scrapinglog_default")
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.assertEqual(ScrapingLog.objects.count(), 2)
+
+    @override_settings(
+        SCRAPING_LOG_RETENTION_DAYS={"success": 8, "failure": 38}, SCRAPING_LOG_PARTITION_MONTHS_AHEAD=1
+    )
+    def test_handle_drops_what_the_longest_retention_expired(self):
+        with mock.patch("etl.services.now", return_value=self.now):
+            result = ScrapingLogRetentionService().handle()
+        self.assertEqual(result["dropped_partitions"], ["etl_scrapinglog_p202401"])
+
+        with override_settings(SCRAPING_LOG_RETENTION_DAYS={"success": 30, "failure": 0}):
+            with mock.patch("etl.services.now", return_value=self.now + timedelta(days=60)):
+                result = ScrapingLogRetentionService().handle()
+        self.assertEqual(result["dropped_partitions"], [])
+        self.assertIn(datetime(2024, 6, 1, tzinfo=timezone.utc), partitions.get_partitions())
+
+    def test_check_stops_migrations_that_alter_the_partitioned_table(self):
+        migration = mock.Mock(app_label="etl")
+        migration.name = "0017_scrapinglog_level"
+        with mock.patch("etl.checks.get_pending_scraping_log_migrations", return_value=[migration]):
+            errors = check_partitioned_scraping_log_migrations(None, databases=["default"])
+        self.assertEqual([error.id for error in errors], ["etl.E001"])
+        self.assertIn("etl.0017_scrapinglog_level", errors[0].msg)
+
+        self.assertEqual(get_pending_scraping_log_migrations(), [])
+        self.assertEqual(check_partitioned_scraping_log_migrations(None, databases=["default"]), [])
+
+
+class CareerStatLoadTests(TestCase):
+    """Career stats are upserted on (player, season, team), NULL team included."""
+
+    def add_snapshot(self, career_stats):
+        return RawVikingsNFL.objects.create(
+            data=[
+                {
+                    "player_name": "Justin Jefferson",
+                    "profile_link": "/team/players-roster/justin-jefferson/",
+                    "details": {"Age": "25", "career_stats": career_stats},
+                }
+            ]
+        )
+
+    def get_stats(self):
+        return list(CareerStat.objects.order_by("season", "team").values_list("season", "team", "yards"))
+
+    @skipUnlessDBFeature("supports_nulls_distinct_unique_constraints")
+    def test_upsert_updates_each_season_once(self):
+        player = create_player()
+        service = VikingsNFLService()
+        service.upsert_career_stats(
+            player,
+            [
+                CareerStat(player=player, season="2022", team="MIN", yards=1809),
+                CareerStat(player=player, season="2023", team=None, yards=1000),
+                # The latest season listed twice: the last one wins.
+                CareerStat(player=player, season="2023", team=None, yards=1074),
+            ],
+        )
+        service.upsert_career_stats(player, [CareerStat(player=player, season="2022", team="MIN", yards=1810)])
+        self.assertEqual(self.get_stats(), [("2022", "MIN", 1810), ("2023", None, 1074)])
+
+    @skipUnlessDBFeature("supports_nulls_distinct_unique_constraints")
+    def test_reloads_are_idempotent(self):
+        self.add_snapshot({"2022": {"SEASON": "2022", "TEAM": "MIN", "YDS": "1809"}, "2023": None})
+        VikingsNFLService().handle()
+        VikingsNFLService().handle(full_rebuild=True)
+        self.assertEqual(self.get_stats(), [("2022", "MIN", 1809), ("2023", None, None)])
+
+        self.add_snapshot({"2023": {"SEASON": "2023", "YDS": "1074"}})
+        VikingsNFLService().handle()
+        self.assertEqual(self.get_stats(), [("2022", "MIN", 1809), ("2023", None, 1074)])
+        self.assertEqual(VikingsNFL.objects.count(), 1)
+
+    @skipUnlessDBFeature("supports_nulls_distinct_unique_constraints")
+    def test_migration_keeps_the_latest_duplicate(self):
+        natural_key = import_module("etl.migrations.0012_careerstat_natural_key")
+        (constraint,) = CareerStat._meta.constraints
+        with connection.schema_editor() as schema_editor:
+            schema_editor.remove_constraint(CareerStat, constraint)
+
+        player, other_player = create_player(), create_player("T.J. Hockenson")
+        updated_at = now()
+        for age, yards in [(2, 1500), (0, 1809), (1, 1600)]:
+            stat = CareerStat.objects.create(player=player, season="2022", team="MIN", yards=yards)
+            CareerStat.objects.filter(id=stat.id).update(updated_at=updated_at - timedelta(days=age))
+        for yards in [900, 1000]:
+            CareerStat.objects.create(player=player, season="2023", team=None, yards=yards)
+        CareerStat.objects.create(player=other_player, season="2022", team="MIN", yards=914)
+
+        natural_key.collapse_duplicate_career_stats(django_apps, None)
+        self.assertEqual(
+            list(CareerStat.objects.order_by("player__name", "season").values_list("player__name", "season", "yards")),
+            [("Justin Jefferson", "2022", 1809), ("Justin Jefferson", "2023", 1000), ("T.J. Hockenson", "2022", 914)],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Checks the PostgreSQL server version.")
+    def test_check_requires_nulls_not_distinct_support(self):
+        self.assertEqual(check_career_stat_nulls_not_distinct(None, databases=["default"]), [])
+        with mock.patch.object(
+            type(connection.features), "supports_nulls_distinct_unique_constraints", new_callable=mock.PropertyMock
+        ) as supported:
+            supported.return_value = False
+            errors = check_career_stat_nulls_not_distinct(None, databases=["default"])
+        self.assertEqual([error.id for error in errors], ["etl.E002"])
+
+
+class RawSnapshotStreamingTests(TestCase):
+    """The ETL services stream raw snapshots instead of loading the whole history."""
+
+    def setUp(self):
+        for index in range(5):
+            RawNorsemenShow.objects.create(data=[{"character_name": f"Character {index}"}, {"character_name": "Orm"}])
+        RawNorsemenShow.objects.create(data=[])
+
+    @override_settings(ETL_ITERATOR_CHUNK_SIZE=2)
+    def test_records_are_read_in_chunks_in_snapshot_order(self):
+        raw_snapshots = RawNorsemenShow.objects.order_by("created_at", "id")
+        with mock.patch.object(QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator) as iterator:
+            records = NorsemenShowService().iter_records(raw_snapshots)
+            self.assertEqual(next(records), {"character_name": "Character 0"})
+            iterator.assert_called_once_with(mock.ANY, chunk_size=2)
+            self.assertEqual(len(list(records)), 9)
+
+        # Only the data column is read.
+        (snapshots,) = [call.args[0] for call in iterator.call_args_list]
+        self.assertEqual(snapshots.query.deferred_loading, ({"data"}, False))
+
+    def test_snapshots_are_not_cached_on_the_queryset(self):
+        raw_snapshots = RawNorsemenShow.objects.order_by("created_at", "id")
+        list(NorsemenShowService().iter_records(raw_snapshots))
+        self.assertIsNone(raw_snapshots._result_cache)
+
+
+class ShowLoadTests(TestCase):
+    """The Vikings and Norsemen loads give the same rows with ETL_BULK_UPSERT on and off."""
+
+    VIKINGS_SNAPSHOTS = [
+        [
+            {
+                "character_name": "Ragnar Lothbrok",
+                "href": "https://www.history.com/ragnar",
+                "img_src": "ragnar.png",
+                "actor_name": "Travis Fimmel",
+                "character_description": "A farmer.",
+            },
+            {"character_name": "Floki", "href": "https://www.history.com/floki", "actor_name": "Gustaf Skarsgard"},
+        ],
+        [
+            {
+                "character_name": "Ragnar Lothbrok",
+                "href": "https://www.history.com/ragnar-lothbrok",
+                "actor_name": "Travis Fimmel",
+                "character_description": "King of Kattegat.",
+            },
+            # No actor page, so it is skipped.
+            {"character_name": "Bjorn Ironside", "actor_name": "Alexander Ludwig"},
+        ],
+    ]
+    NORSEMEN_SNAPSHOTS = [
+        [
+            {"character_name": "Orm", "actor_name": "Nils Jorgen Kaalstad", "description": "A chieftain's brother."},
+            {"character_name": "Rufus", "actor_name": "Trond Fausa Aurvag", "description": "A Roman slave."},
+        ],
+        [
+            {"character_name": "Orm", "actor_name": "Nils Jorgen Kaalstad", "description": "The chieftain."},
+            {"character_name": "Arvid", "actor_name": "Kare Conradi", "description": "A warrior."},
+            {"character_name": "Arvid", "actor_name": "Kare Conradi", "description": "A retired warrior."},
+        ],
+    ]
+
+    def load(self, service, snapshots):
+        """Store the raw snapshots and load them in one ETL run."""
+        for snapshot in snapshots:
+            service.raw_model.objects.create(data=snapshot)
+        service.handle()
+
+    def assert_rows(self):
+        self.assertEqual(
+            list(
+                VikingsShow.objects.order_by("character_name").values_list(
+                    "character_name", "actor_url", "img_src", "character_description"
+                )
+            ),
+            [
+                ("Floki", "https://www.history.com/floki", None, None),
+                ("Ragnar Lothbrok", "https://www.history.com/ragnar-lothbrok", None, "King of Kattegat."),
+            ],
+        )
+        self.assertEqual(
+            list(NorsemenShow.objects.order_by("character_name").values_list("character_name", "description")),
+            [("Arvid", "A retired warrior."), ("Orm", "The chieftain."), ("Rufus", "A Roman slave.")],
+        )
+
+    def assert_loads(self, bulk):
+        with override_settings(ETL_BULK_UPSERT=bulk), mock.patch(
+            "etl.services.bulk_upsert", wraps=bulk_upsert
+        ) as upsert:
+            # The overlapping snapshots in one run: the latest record of a character wins.
+            self.load(VikingsShowService(), self.VIKINGS_SNAPSHOTS)
+            self.load(NorsemenShowService(), self.NORSEMEN_SNAPSHOTS)
+            self.assert_rows()
+            for model in (VikingsShow, NorsemenShow, RawVikingsShow, RawNorsemenShow, ETLWatermark):
+                model.objects.all().delete()
+
+            # One run per snapshot: the second one updates the rows in place.
+            self.load(VikingsShowService(), self.VIKINGS_SNAPSHOTS[:1])
+            self.load(NorsemenShowService(), self.NORSEMEN_SNAPSHOTS[:1])
+            ragnar = VikingsShow.objects.get(character_name="Ragnar Lothbrok")
+            orm = NorsemenShow.objects.get(character_name="Orm")
+            self.load(VikingsShowService(), self.VIKINGS_SNAPSHOTS[1:])
+            self.load(NorsemenShowService(), self.NORSEMEN_SNAPSHOTS[1:])
+            self.assert_rows()
+
+        self.assertEqual(VikingsShow.objects.get(character_name="Ragnar Lothbrok").id, ragnar.id)
+        updated_orm = NorsemenShow.objects.get(character_name="Orm")
+        self.assertEqual((updated_orm.id, updated_orm.created_at), (orm.id, orm.created_at))
+        self.assertGreater(updated_orm.updated_at, orm.updated_at)
+        return upsert
+
+    def test_bulk_upsert(self):
+        upsert = self.assert_loads(bulk=True)
+        update_fields = {call.args[0]: call.kwargs["update_fields"] for call in upsert.call_args_list}
+        # VikingsShow has no timestamps, while Norsemen rows bump updated_at.
+        self.assertEqual(update_fields[VikingsShow], ["actor_url", "img_src", "name", "character_description"])
+        self.assertEqual(update_fields[NorsemenShow], ["name", "description", "updated_at"])
+
+    def test_row_by_row(self):
+        self.assert_loads(bulk=False).assert_not_called()
+
+
+class ETLWatermarkTests(TestCase):
+    """Each ETL run loads only the raw snapshots created since the last successful one."""
+
+    def add_snapshot(self, character_name):
+        return RawNorsemenShow.objects.create(
+            data=[{"character_name": character_name, "actor_name": f"Actor of {character_name}"}]
+        )
+
+    def get_watermark(self):
+        return ETLWatermark.objects.get(source=NorsemenShowService.source).last_processed_at
+
+    def get_processed(self, process):
+        return [
+            [item["character_name"] for snapshot in call.args[0] for item in snapshot.data]
+            for call in process.call_args_list
+        ]
+
+    def test_run_without_new_snapshots_is_a_no_op(self):
+        snapshot = self.add_snapshot("Orm")
+        NorsemenShowService().handle()
+        self.assertEqual(self.get_watermark(), snapshot.created_at)
+
+        with mock.patch.object(NorsemenShowService, "process") as process:
+            NorsemenShowService().handle()
+        process.assert_not_called()
+        self.assertEqual(self.get_watermark(), snapshot.created_at)
+
+    def test_next_run_loads_only_new_snapshots(self):
+        self.add_snapshot("Orm")
+        NorsemenShowService().handle()
+        latest = self.add_snapshot("Rufus")
+        with mock.patch.object(NorsemenShowService, "process") as process:
+            NorsemenShowService().handle()
+        self.assertEqual(self.get_processed(process), [["Rufus"]])
+        self.assertEqual(self.get_watermark(), latest.created_at)
+
+    def test_failed_load_leaves_the_watermark(self):
+        loaded = self.add_snapshot("Orm")
+        NorsemenShowService().handle()
+        self.add_snapshot("Rufus")
+        with mock.patch.object(NorsemenShowService, "process", side_effect=RuntimeError("Load killed")):
+            with self.assertRaises(RuntimeError):
+                NorsemenShowService().handle()
+        self.assertEqual(self.get_watermark(), loaded.created_at)
+
+        NorsemenShowService().handle()
+        self.assertEqual(
+            list(NorsemenShow.objects.order_by("character_name").values_list("character_name", flat=True)),
+            ["Orm", "Rufus"],
+        )
+
+    def test_full_rebuild_replays_every_snapshot(self):
+        self.add_snapshot("Orm")
+        self.add_snapshot("Rufus")
+        NorsemenShowService().handle()
+        with mock.patch.object(NorsemenShowService, "process") as process:
+            NorsemenShowService().handle(full_rebuild=True)
+        self.assertEqual(self.get_processed(process), [["Orm", "Rufus"]])
+
+    def test_rebuild_etl_replays_every_source(self):
+        handled = []
+        with mock.patch.object(BaseETLService, "handle", autospec=True) as handle:
+            handle.side_effect = lambda service, **kwargs: handled.append((service.source, kwargs))
+            call_command("rebuild_etl", stdout=io.StringIO())
+        self.assertEqual(handled, [(source, {"full_rebuild": True}) for source in ETL_SERVICES])
+
+        handled.clear()
+        with mock.patch.object(BaseETLService, "handle", autospec=True) as handle:
+            handle.side_effect = lambda service, **kwargs: handled.append((service.source, kwargs))
+            call_command("rebuild_etl", "vikings_nfl", stdout=io.StringIO())
+            with self.assertRaisesMessage(CommandError, "Unknown ETL sources: vikings"):
+                call_command("rebuild_etl", "vikings", stdout=io.StringIO())
+        self.assertEqual(handled, [("vikings_nfl", {"full_rebuild": True})])
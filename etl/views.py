@@ -1,11 +1,30 @@
-from etl.services import MetricsService
+from django.conf import settings
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import DenseRank, RowNumber
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from etl.cache import cache_get, cache_set, get_data_version, get_response_cache_key, get_response_etag
+from etl.filters import FullTextSearchFilter
+from etl.pagination import ShowCursorPagination
+from etl.renderers import CSVRenderer, NDJSONRenderer
+from etl.services import (
+    METRICS_WINDOWS,
+    MetricsService,
+    NorsemenShowService,
+    VikingsNFLService,
+    VikingsShowService,
+)
 from rest_framework import viewsets
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from .models import VikingsShow, NorsemenShow, VikingsNFL
+from .models import VikingsShow, NorsemenShow, VikingsNFL, CareerStat
 from .serializers import (
     VikingsShowSerializer,
     NorsemenShowSerializer,
@@ -14,22 +33,155 @@ from .serializers import (
 
 
 class BaseShowViewSet(viewsets.ModelViewSet):
-    """A base View Set class for get requests."""
+    """
+    A base View Set class for get requests.
+
+    Responses carry an ETag and Last-Modified derived from the data version of
+    `data_source`, which is bumped after every ETL load and row edit. A matching
+    If-None-Match or If-Modified-Since gets a 304 before the queryset runs, and
+    other list and detail responses are cached for API_CACHE_TIMEOUT seconds
+    under the same version.
+
+    Pages are numbered by default; `?pagination=cursor` switches to keyset
+    pagination on `cursor_ordering` for clients that walk the whole table.
+
+    `?fields=` and `?exclude=` pick the serializer fields to render, and only
+    their columns are loaded. List views also leave out the serializer's
+    `Meta.list_exclude` columns unless `?fields=` names them.
+
+    `export/` streams every row that matches the filters and search as NDJSON,
+    or as CSV with `?format=csv`, reading them through a server-side cursor in
+    chunks of API_EXPORT_CHUNK_SIZE. Exports are revalidated like other
+    responses but never cached.
+    """
 
     http_method_names = ["get"]
+    data_source = None
 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     ordering_fields = ["name", "character_name"]
 
+    # Every column ?search= looks at. On PostgreSQL the ones in the model's
+    # search_vector (migration 0016) are searched through it and the rest,
+    # listed in `search_substring_fields`, by substring; elsewhere all of them
+    # by substring.
     search_fields = []
+    search_substring_fields = []
+    search_trigram_fields = ["name", "character_name"]
     filterset_fields = []
 
+    cursor_pagination_class = ShowCursorPagination
+    # character_name is unique, so its unique index serves the keyset alone.
+    cursor_ordering = ("character_name",)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and self.use_cursor_pagination():
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+    def use_cursor_pagination(self):
+        query_params = self.request.query_params
+        return query_params.get("pagination") == "cursor" or "cursor" in query_params
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        loaded = {field.source for field in self.get_serializer().fields.values()} & columns
+        if self.use_cursor_pagination():
+            # The cursor is read from the last row's ordering columns.
+            ordering = OrderingFilter().get_ordering(self.request, queryset, self) or self.cursor_ordering
+            loaded |= {field.lstrip("-") for field in ordering} & columns
+        return queryset.only(*loaded)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_sparse_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_sparse_fieldset(self):
+        """Return the serializer `fields` and `exclude` lists asked for with ?fields= and ?exclude=."""
+        fields = self.get_query_param_list("fields")
+        exclude = self.get_query_param_list("exclude") or []
+        if self.action == "list" and fields is None:
+            exclude += getattr(self.get_serializer_class().Meta, "list_exclude", [])
+        return {"fields": fields, "exclude": exclude}
+
+    def get_query_param_list(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    def list(self, request, *args, **kwargs):
+        return self.get_versioned_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_versioned_response(super().retrieve, request, *args, **kwargs)
+
+    @action(detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        return self.get_versioned_response(self.stream_export, request, *args, cache_response=False, **kwargs)
+
+    def stream_export(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            queryset = queryset.order_by(*self.cursor_ordering)
+        serializer = self.get_serializer()
+        rows = (
+            serializer.to_representation(instance)
+            for instance in queryset.iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE)
+        )
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(rows, list(serializer.fields)),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{self.basename}.{renderer.format}"'
+        return response
+
+    def get_versioned_response(self, handler, request, *args, cache_response=True, **kwargs):
+        """Answer conditional requests with a 304, otherwise serve the cached response or build it with `handler`."""
+        version = get_data_version(self.data_source)
+        etag = get_response_etag(request, version)
+        last_modified = int(version) or None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if cache_response:
+            response = self.get_cached_response(handler, version, request, *args, **kwargs)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_cached_response(self, handler, version, request, *args, **kwargs):
+        """Serve the response from the cache, or build it with `handler` and cache it."""
+        if not settings.API_CACHE_TIMEOUT:
+            return handler(request, *args, **kwargs)
+
+        cache_key = get_response_cache_key(request, self.data_source, version)
+        data = cache_get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache_set(cache_key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
 
 class VikingsShowViewSet(BaseShowViewSet):
     """Viewset for the VikingsShow model."""
 
     queryset = VikingsShow.objects.all()
     serializer_class = VikingsShowSerializer
+    data_source = VikingsShowService.source
 
     search_fields = [
         "actor_url",
@@ -38,6 +190,7 @@ class VikingsShowViewSet(BaseShowViewSet):
         "character_name",
         "character_description",
     ]
+    search_substring_fields = ["actor_url", "img_src"]
     filterset_fields = ["actor_url", "name", "character_name"]
 
 
@@ -46,25 +199,70 @@ class NorsemenShowViewSet(BaseShowViewSet):
 
     queryset = NorsemenShow.objects.all()
     serializer_class = NorsemenShowSerializer
+    data_source = NorsemenShowService.source
 
     search_fields = ["name", "character_name", "description"]
     filterset_fields = ["name", "character_name"]
 
 
 class NFLVikingsShowViewSet(BaseShowViewSet):
-    """Viewset for the NorsemenShow model."""
+    """
+    Viewset for the VikingsNFL model.
+
+    Career stats are prefetched for the whole page, newest season first and at
+    most API_CAREER_STATS_LIMIT per player, unless `?fields=`/`?exclude=` leave
+    them out; `?seasons=N` keeps only each player's latest N seasons.
+    """
 
     queryset = VikingsNFL.objects.all()
     serializer_class = VikingsNFLSerializer
+    data_source = VikingsNFLService.source
 
-    search_fields = ["name", "profile_link", "age"]
+    search_fields = ["name", "profile_link", "age", "college", "biography_html"]
+    search_substring_fields = ["profile_link", "age"]
+    search_trigram_fields = ["name"]
     filterset_fields = ["name", "profile_link"]
-    
+    cursor_ordering = ("name", "id")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if "career_stats" not in self.get_serializer().fields:
+            return queryset
+        return queryset.prefetch_related(Prefetch("career_stats", queryset=self.get_career_stats_queryset()))
+
+    def get_career_stats_queryset(self):
+        # Prefetch cannot take a sliced queryset without a to_attr, so the
+        # per-player cap is a ROW_NUMBER() filter, which is what slicing compiles to.
+        ordering = [F("season").desc(), F("team")]
+        career_stats = CareerStat.objects.annotate(
+            stat_number=Window(RowNumber(), partition_by=F("player_id"), order_by=ordering)
+        ).filter(stat_number__lte=settings.API_CAREER_STATS_LIMIT)
+
+        seasons = self.request.query_params.get("seasons")
+        if seasons:
+            if not seasons.isdigit() or int(seasons) < 1:
+                raise ValidationError({"seasons": "Expected a positive number of seasons."})
+            career_stats = career_stats.annotate(
+                season_rank=Window(DenseRank(), partition_by=F("player_id"), order_by=F("season").desc())
+            ).filter(season_rank__lte=int(seasons))
+        return career_stats.order_by(*ordering)
+
 
 class ScrapingMetricsView(APIView):
-    """API View to fetch scraping metrics."""
+    """
+    API View to fetch scraping metrics, optionally over the last `?window=24h|7d|30d`.
+
+    Metrics come from the hourly rollups; `?live=true` computes them from the
+    raw scraping logs instead.
+    """
 
     def get(self, request, *args, **kwargs):
+        window = request.query_params.get("window")
+        if window and window not in METRICS_WINDOWS:
+            raise ValidationError({"window": f"Expected one of {', '.join(METRICS_WINDOWS)}."})
         # Fetch metrics from MetricsService
-        metrics = MetricsService.get_scraping_metrics()
+        if request.query_params.get("live", "").lower() in ("1", "true", "yes"):
+            metrics = MetricsService.get_live_scraping_metrics(window=window)
+        else:
+            metrics = MetricsService.get_scraping_metrics(window=window)
         return Response(metrics)
\ No newline at end of file
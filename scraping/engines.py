@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import aiohttp
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class FetchEngine:
+    """Base class for engines that fetch and parse a batch of pages."""
+
+    def __init__(self, scrape_service):
+        """Initialize with the ScrapeService used for sessions and logging."""
+        self.scrape_service = scrape_service
+
+    def fetch_all(self, urls, parse) -> list:
+        """
+        Fetch every url and run `parse` over its content.
+
+        Results keep the order of `urls`. A page that fails to fetch or parse is
+        returned as its exception so one bad page does not sink the batch.
+        """
+        raise NotImplementedError
+
+
+class ThreadedFetchEngine(FetchEngine):
+    """Fetch pages with ScrapeService.fetch_parsed on a thread pool."""
+
+    def __init__(self, scrape_service, max_workers=1):
+        super().__init__(scrape_service)
+        self.max_workers = max_workers
+
+    def fetch_all(self, urls, parse) -> list:
+        def fetch_one(url):
+            try:
+                return self.scrape_service.fetch_parsed(url, parse)
+            except Exception as e:
+                return e
+
+        def fetch_in_thread(url):
+            try:
+                return fetch_one(url)
+            finally:
+                # Nothing closes a pool thread's database connection, unlike a request's.
+                close_old_connections()
+
+        if self.max_workers <= 1:
+            return [fetch_one(url) for url in urls]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fetch_in_thread, urls))
+
+
+class AsyncFetchEngine(FetchEngine):
+    """
+    Fetch pages concurrently on an asyncio event loop.
+
+    Requests are capped globally and per host, and parsing runs on a worker pool
+    so BeautifulSoup never blocks the loop.
+
+    Only seed.py fans pages out on an engine; scheduled scrapes fetch one page
+    per Celery task instead (see etl.tasks.scrape_source).
+    """
+
+    def __init__(self, scrape_service, max_concurrency, host_concurrency, parse_workers):
+        super().__init__(scrape_service)
+        self.max_concurrency = max_concurrency
+        self.host_concurrency = host_concurrency
+        self.parse_workers = parse_workers
+
+    def fetch_all(self, urls, parse) -> list:
+        return asyncio.run(self._fetch_all(urls, parse))
+
+    def get_host_concurrency(self, host: str) -> int:
+        """Return the concurrency cap for a host, honouring SCRAPING_HOST_CONFIG."""
+        host_config = self.scrape_service.session_pool.host_config.get(host, {})
+        return host_config.get("max_concurrency", self.host_concurrency)
+
+    async def _fetch_all(self, urls, parse) -> list:
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        host_limits = {
+            host: asyncio.Semaphore(self.get_host_concurrency(host))
+            for host in {urlsplit(url).netloc for url in urls}
+        }
+
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=self.parse_workers) as parse_pool:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                tasks = [
+                    self._fetch_one(
+                        session, url, parse, parse_pool, global_limit, host_limits[urlsplit(url).netloc]
+                    )
+                    for url in urls
+                ]
+                return await asyncio.gather(*tasks)
+
+    async def _fetch_one(self, session, url, parse, parse_pool, global_limit, host_limit):
+        scrape_service = self.scrape_service
+        connect_timeout, read_timeout = scrape_service.session_pool.get_timeout(url)
+        timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        cached_page = await sync_to_async(scrape_service.get_cached_page)(url)
+        headers = scrape_service.session_pool.get_headers(urlsplit(url).netloc)
+
+        # Wait on the host first so a busy host does not hold a global slot.
+        async with host_limit, global_limit:
+            start_time = time.time()
+            try:
+                response, content = await self._get(
+                    session, url, timeout, {**headers, **scrape_service.get_conditional_headers(cached_page)}
+                )
+                if scrape_service.is_cache_miss(response.status, cached_page):
+                    # Nothing cached to answer the 304 with, so fetch the page in full.
+                    response, content = await self._get(session, url, timeout, headers)
+                    if response.status == 304:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info,
+                            response.history,
+                            status=304,
+                            message="Not Modified with no cached page",
+                        )
+                not_modified = response.status == 304
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                execution_time = time.time() - start_time
+                error_message = str(e) or e.__class__.__name__
+                await sync_to_async(scrape_service.log_fetch)(
+                    url, "failure", execution_time, error_message=error_message
+                )
+                return Exception(f"Error fetching {url}: {error_message}")
+
+        execution_time = time.time() - start_time
+        if not_modified:
+            page, unchanged = cached_page, True
+        else:
+            page, unchanged = await sync_to_async(scrape_service.store_page)(
+                url, response.headers, content, cached_page
+            )
+        await sync_to_async(scrape_service.log_fetch)(
+            url, "success", execution_time, cache_hit=not_modified, response_size=len(page.content)
+        )
+
+        if unchanged and page.parsed_by == scrape_service.get_parser_name(parse):
+            return page.parsed_data
+        try:
+            parsed_data = await asyncio.get_running_loop().run_in_executor(
+                parse_pool, parse, bytes(page.content)
+            )
+        except Exception as e:
+            return e
+        await sync_to_async(scrape_service.store_parsed_data)(page, parse, parsed_data)
+        return parsed_data
+
+    @staticmethod
+    async def _get(session, url, timeout, headers):
+        """GET a url and return the response with its body."""
+        async with session.get(url, timeout=timeout, headers=headers) as response:
+            response.raise_for_status()
+            return response, await response.read()
+
+
+class PipelineFetchEngine(FetchEngine):
+    """
+    Fetch pages on I/O threads and parse them on a process pool.
+
+    Fetched pages wait in a bounded queue, and at most two pages per parser
+    process are in flight, so whichever stage falls behind stalls the other one
+    instead of buffering unbounded work. `parse` must be picklable, e.g. a
+    module-level function or a staticmethod.
+
+    If the parser pool breaks, e.g. because a parser process died, the fetch
+    threads are stopped and every page not parsed yet is returned as the error.
+
+    Only seed.py fans pages out on an engine; scheduled scrapes fetch one page
+    per Celery task instead (see etl.tasks.scrape_source). The parser processes
+    cannot be started from a daemonic process such as a Celery prefork worker,
+    so get_fetch_engine falls back to threads there.
+    """
+
+    # Seconds a fetch thread waits on the full queue before checking whether to stop.
+    queue_poll_interval = 0.1
+
+    def __init__(self, scrape_service, max_workers, parse_workers, queue_size):
+        super().__init__(scrape_service)
+        self.max_workers = max_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+
+    def fetch_all(self, urls, parse) -> list:
+        pending = object()
+        results = [pending] * len(urls)
+        fetched_pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        parser_name = self.scrape_service.get_parser_name(parse)
+
+        def enqueue(item):
+            # Blocks while the parser processes are behind, until the pipeline stops.
+            while not stop.is_set():
+                try:
+                    fetched_pages.put(item, timeout=self.queue_poll_interval)
+                    return
+                except queue.Full:
+                    continue
+
+        def fetch_one(index, url):
+            if stop.is_set():
+                return
+            try:
+                page, unchanged = self.scrape_service.fetch_page(url)
+            except Exception as e:
+                results[index] = e
+                return
+            finally:
+                # Nothing closes a pool thread's database connection, unlike a request's.
+                close_old_connections()
+            if unchanged and page.parsed_by == parser_name:
+                results[index] = page.parsed_data
+                return
+            enqueue((index, page))
+
+        def collect(parses):
+            for parse_future in parses:
+                index, page = in_flight.pop(parse_future)
+                try:
+                    results[index] = parse_future.result()
+                    self.scrape_service.store_parsed_data(page, parse, results[index])
+                except Exception as e:
+                    results[index] = e
+
+        in_flight = {}
+        failure = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as fetch_pool, ProcessPoolExecutor(
+            max_workers=self.parse_workers, initializer=django.setup
+        ) as parse_pool:
+            fetches = [fetch_pool.submit(fetch_one, index, url) for index, url in enumerate(urls)]
+            threading.Thread(target=lambda: (wait(fetches), enqueue(None)), daemon=True).start()
+
+            try:
+                while (fetched_page := fetched_pages.get()) is not None:
+                    if len(in_flight) >= self.parse_workers * 2:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    index, page = fetched_page
+                    in_flight[parse_pool.submit(parse, bytes(page.content))] = (index, page)
+                collect(list(in_flight))
+            except Exception as e:
+                # Release the fetch threads blocked on the queue and drop the fetches not started yet.
+                stop.set()
+                fetch_pool.shutdown(wait=False, cancel_futures=True)
+                collect(list(in_flight))
+                failure = e
+
+        return [failure if result is pending else result for result in results]
+
+
+def get_fetch_engine(scrape_service, max_workers=1) -> FetchEngine:
+    """Build the engine selected by SCRAPING_ENGINE; `max_workers` sizes the fetch thread pool."""
+    if settings.SCRAPING_ENGINE == "pipeline":
+        if multiprocessing.current_process().daemon:
+            logger.warning("Daemonic processes cannot start parser processes; fetching on threads instead.")
+            return ThreadedFetchEngine(scrape_service, max_workers=max_workers)
+        return PipelineFetchEngine(
+            scrape_service,
+            max_workers=max_workers,
+            parse_workers=settings.SCRAPING_PARSE_WORKERS,
+            queue_size=settings.SCRAPING_PIPELINE_QUEUE_SIZE,
+        )
+    if settings.SCRAPING_ENGINE == "asyncio":
+        return AsyncFetchEngine(
+            scrape_service,
+            max_concurrency=settings.SCRAPING_ASYNC_MAX_CONCURRENCY,
+            host_concurrency=settings.SCRAPING_ASYNC_HOST_CONCURRENCY,
+            parse_workers=settings.SCRAPING_PARSE_WORKERS,
+        )
+    return ThreadedFetchEngine(scrape_service, max_workers=max_workers)
@@ -0,0 +1,89 @@
+import atexit
+import logging
+import threading
+import time
+import weakref
+
+from celery.signals import worker_process_shutdown
+from django.db import transaction
+
+from etl.models import ScrapingLog
+from etl.services import MetricsService
+
+logger = logging.getLogger(__name__)
+
+live_buffers = weakref.WeakSet()
+
+
+class ScrapingLogBuffer:
+    """
+    Collects ScrapingLog rows in memory and writes them with bulk_create.
+
+    The buffer is flushed once it holds `max_size` entries or its oldest entry is
+    `max_age` seconds old, and must be flushed explicitly when a scrape ends.
+    Both thresholds are only checked when an entry is added, so an idle buffer
+    holds its entries until the next `add` or `flush`: the scrape tasks flush
+    in their `finally` blocks, and every live buffer is flushed when the
+    process or Celery worker process exits. A process killed outright, e.g. by
+    a hard time limit, loses its pending entries.
+
+    Flushing never raises, as it runs from the scrapers' `finally` blocks where an
+    error would replace the scrape's own.
+    """
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._entries = []
+        self._oldest_entry_at = None
+        self._lock = threading.Lock()
+        live_buffers.add(self)
+
+    def add(self, **fields):
+        """Buffer a log entry; its timestamp is taken now, not when it is written."""
+        with self._lock:
+            self._entries.append(ScrapingLog(**fields))
+            if self._oldest_entry_at is None:
+                self._oldest_entry_at = time.monotonic()
+            should_flush = (
+                len(self._entries) >= self.max_size
+                or time.monotonic() - self._oldest_entry_at >= self.max_age
+            )
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """
+        Write every buffered entry in one bulk insert, then add it to the metrics
+        rollups. Each step commits on its own, so a failed rollup update does not
+        lose the logs; failures are logged.
+        """
+        with self._lock:
+            entries, self._entries = self._entries, []
+            self._oldest_entry_at = None
+        if not entries:
+            return
+        try:
+            ScrapingLog.objects.bulk_create(entries)
+        except Exception:
+            logger.exception("Could not write %d scraping logs", len(entries))
+            return
+        try:
+            # A savepoint, so a failure here leaves an enclosing transaction usable.
+            with transaction.atomic():
+                MetricsService.record_logs(entries)
+        except Exception:
+            logger.exception("Could not add %d scraping logs to the metrics rollups", len(entries))
+
+
+@atexit.register
+def flush_live_buffers():
+    """Flush every buffer still alive, so pending logs survive the process exiting."""
+    for log_buffer in list(live_buffers):
+        log_buffer.flush()
+
+
+@worker_process_shutdown.connect
+def flush_on_worker_process_shutdown(**kwargs):
+    # Celery's pool processes leave with os._exit, which skips atexit.
+    flush_live_buffers()
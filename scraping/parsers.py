@@ -1,8 +1,67 @@
-from bs4 import BeautifulSoup
+from functools import cache
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from bs4.filter import ElementFilter
+from django.conf import settings
+
+# Bump whenever a parser's output changes, so parses cached for unchanged pages are redone.
+PARSER_VERSION = 3
+
+
+@cache
+def get_html_parser() -> str:
+    """Return the SCRAPING_HTML_PARSER backend, falling back to html.parser when it is not installed."""
+    if builder_registry.lookup(settings.SCRAPING_HTML_PARSER) is None:
+        return "html.parser"
+    return settings.SCRAPING_HTML_PARSER
+
+
+def has_classes(classes: str):
+    """
+    Return a SoupStrainer `class_` matcher for tags carrying every class in
+    `classes`, in any order and alongside any others.
+
+    Strainers are checked against the raw class attribute, so a plain string
+    `class_` would have to match it whole, unlike `find(class_=...)`.
+    """
+    wanted = set(classes.split())
+
+    def match(value) -> bool:
+        if not value:
+            return False
+        return wanted <= set(value.split() if isinstance(value, str) else value)
+
+    return match
+
+
+class RegionStrainer(ElementFilter):
+    """
+    A `parse_only` filter that builds every subtree matched by any of the given
+    SoupStrainers and skips the rest of the document. Match classes with
+    `has_classes`.
+    """
+
+    def __init__(self, *strainers: SoupStrainer):
+        super().__init__()
+        self.strainers = strainers
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string) -> bool:
+        # Only called for text outside every kept region.
+        return False
 
 
 class VikingsShowParser:
 
+    CAST_PAGE_REGIONS = RegionStrainer(SoupStrainer("div", class_=has_classes("tile-list tile-boxed")))
+    CHARACTER_PAGE_REGIONS = RegionStrainer(
+        SoupStrainer("header", class_=has_classes("section-title")),
+        SoupStrainer("article", class_=has_classes("main-article")),
+    )
+
     def __init__(self, soup: BeautifulSoup):
         """Initialize with the BeautifulSoup object."""
         self.soup = soup
@@ -20,17 +79,16 @@ class VikingsShowParser:
             print("No <li> elements found in container_div.")
             return []
 
-        cast_data = [
-            {
-                "href": item.find("a").get("href") if item.find("a") else None,
-                "img_src": (
-                    item.find("div", class_="img-container").find("img").get("src")
-                    if item.find("div", class_="img-container")
-                    else None
-                ),
-            }
-            for item in li_elements
-        ]
+        cast_data = []
+        for item in li_elements:
+            link = item.find("a")
+            img_container = item.find("div", class_="img-container")
+            cast_data.append(
+                {
+                    "href": link.get("href") if link else None,
+                    "img_src": img_container.find("img").get("src") if img_container else None,
+                }
+            )
 
         return cast_data
 
@@ -47,10 +105,12 @@ class VikingsShowParser:
             print("No <h1> tag found in the header.")
             return None, None, None
 
-        character_name = h1_tag.find("strong").get_text(strip=True) if h1_tag.find("strong") else None
+        strong_tag = h1_tag.find("strong")
+        character_name = strong_tag.get_text(strip=True) if strong_tag else None
+        small_tag = h1_tag.find("small")
         actor_name = (
-            h1_tag.find("small").get_text(strip=True).replace("Played by", "").strip()
-            if h1_tag.find("small")
+            small_tag.get_text(strip=True).replace("Played by", "").strip()
+            if small_tag
             else None
         )
 
@@ -59,13 +119,19 @@ class VikingsShowParser:
             print("No article with class 'main-article' found.")
             return character_name, actor_name, None
 
-        character_description = article.find("p").get_text(strip=True) if article.find("p") else None
+        paragraph = article.find("p")
+        character_description = paragraph.get_text(strip=True) if paragraph else None
 
         return character_name, actor_name, character_description
 
 
 class NorsemenShowParser:
 
+    # The whole article body is kept, as list items inside its tables are skipped by ancestry.
+    CHARACTER_LIST_REGIONS = RegionStrainer(
+        SoupStrainer("div", class_=has_classes("mw-content-ltr mw-parser-output"))
+    )
+
     def __init__(self, soup: BeautifulSoup):
         """Initialize with the BeautifulSoup object."""
         self.soup = soup
@@ -125,6 +191,13 @@ class NorsemenShowParser:
 
 class NFLParser:
 
+    PLAYERS_TABLE_REGIONS = RegionStrainer(SoupStrainer("table"))
+    PLAYER_DETAILS_REGIONS = RegionStrainer(
+        SoupStrainer("div", class_=has_classes("nfl-t-person-tile__stat-details")),
+        SoupStrainer("table", attrs={"summary": "Career Stats"}),
+        SoupStrainer("div", class_=has_classes("d3-l-grid--inner nfl-c-biography")),
+    )
+
     def __init__(self, soup: BeautifulSoup):
         """Initialize with the BeautifulSoup object."""
         self.soup = soup
@@ -201,8 +274,9 @@ class NFLParser:
         rows = stats_table.find("tbody").find_all("tr")
         stats_data = {}
         for row in rows:
-            season_text = row.find("td").text.strip()
-            row_data = [td.get_text(strip=True) for td in row.find_all("td")]
+            cells = row.find_all("td")
+            season_text = cells[0].text.strip()
+            row_data = [td.get_text(strip=True) for td in cells]
             stats_data[season_text] = dict(zip(headers, row_data))
 
         stats_data["2021"] = stats_data.get("2021", None)
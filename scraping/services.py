@@ -1,9 +1,20 @@
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import time
 import requests
 from bs4 import BeautifulSoup
-from etl.models import RawVikingsShow, RawNorsemenShow, RawVikingsNFL, ScrapingLog
-from scraping.parsers import VikingsShowParser, NorsemenShowParser, NFLParser
+from django.conf import settings
+from etl.models import RawVikingsShow, RawNorsemenShow, RawVikingsNFL, PageCache
+from scraping.engines import get_fetch_engine
+from scraping.log_buffer import ScrapingLogBuffer
+from scraping.parsers import (
+    PARSER_VERSION,
+    VikingsShowParser,
+    NorsemenShowParser,
+    NFLParser,
+    get_html_parser,
+)
+from scraping.sessions import get_session_pool
 
 VIKINGS_SHOW_BASE_URL = "https://www.history.com"
 VIKINGS_SHOW_CAST_URL = "https://www.history.com/shows/vikings/cast"
@@ -11,193 +22,369 @@ NORSEMEN_SHOW_BASE_URL = "https://en.wikipedia.org/wiki/Norsemen_(TV_series)"
 NFL_ROSTER_URL = "https://www.vikings.com/team/players-roster/"
 
 
+def get_content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
 class ScrapeService:
 
-    def log_scraping_task(self, task_name, status, execution_time, retries=0, error_message=None, source=None):
-        """Log scraping task details in the database."""
-        ScrapingLog.objects.create(
+    def __init__(self):
+        self.session_pool = get_session_pool()
+        self.log_buffer = ScrapingLogBuffer(
+            max_size=settings.SCRAPING_LOG_BUFFER_SIZE,
+            max_age=settings.SCRAPING_LOG_FLUSH_INTERVAL,
+        )
+
+    def log_scraping_task(
+        self,
+        task_name,
+        status,
+        execution_time,
+        retries=0,
+        error_message=None,
+        source=None,
+        cache_hit=None,
+        response_size=None,
+    ):
+        """Buffer scraping task details for the database; see flush_logs."""
+        self.log_buffer.add(
             task_name=task_name,
             status=status,
             execution_time=execution_time,
             retries=retries,
             error_message=error_message,
-            source=source
+            source=source,
+            cache_hit=cache_hit,
+            response_size=response_size,
         )
 
-    def fetch(self, url: str) -> bytes:
+    def log_fetch(self, url, status, execution_time, retries=0, error_message=None, cache_hit=None, response_size=None):
+        """Log the outcome of fetching a single url."""
+        self.log_scraping_task(
+            task_name=f"Fetch URL: {url}",
+            status=status,
+            execution_time=execution_time,
+            retries=retries,
+            error_message=error_message,
+            source=url,
+            cache_hit=cache_hit,
+            response_size=response_size,
+        )
+
+    def flush_logs(self):
+        """Write the buffered scraping logs; call when a scrape finishes or fails."""
+        self.log_buffer.flush()
+
+    def fetch_page(self, url: str) -> tuple[PageCache, bool]:
+        """
+        Conditionally fetch a url against its cached validators.
+
+        Returns the cached page and whether it is unchanged since the last fetch,
+        either because the server answered 304 Not Modified or because the body
+        hashes the same. A 304 with no cached page to serve is a cache miss, and
+        the url is fetched again without the conditional headers.
+        """
         start_time = time.time()
         retries = 0
+        cached_page = self.get_cached_page(url)
         try:
-            response = requests.get(url)
+            response = self.session_pool.get(url, headers=self.get_conditional_headers(cached_page))
+            if self.is_cache_miss(response.status_code, cached_page):
+                response = self.session_pool.get(url)
+                if response.status_code == 304:
+                    raise requests.exceptions.HTTPError("304 Not Modified with no cached page", response=response)
             response.raise_for_status()
-            execution_time = time.time() - start_time
-            self.log_scraping_task(
-                task_name=f"Fetch URL: {url}",
-                status="success",
-                execution_time=execution_time,
-                retries=retries,
-                source=url
-            )
-            return response.content
         except requests.exceptions.RequestException as e:
             execution_time = time.time() - start_time
-            self.log_scraping_task(
-                task_name=f"Fetch URL: {url}",
-                status="failure",
-                execution_time=execution_time,
-                retries=retries,
-                error_message=str(e),
-                source=url
-            )
+            self.log_fetch(url, "failure", execution_time, retries=retries, error_message=str(e))
             raise Exception(f"Error fetching {url}: {e}")
 
-    def soupify(self, html_content) -> BeautifulSoup:
-        return BeautifulSoup(html_content, "html.parser")
+        execution_time = time.time() - start_time
+        not_modified = response.status_code == 304
+        if not_modified:
+            page, unchanged = cached_page, True
+        else:
+            page, unchanged = self.store_page(url, response.headers, response.content, cached_page)
+        self.log_fetch(
+            url,
+            "success",
+            execution_time,
+            retries=retries,
+            cache_hit=not_modified,
+            response_size=len(page.content),
+        )
+        return page, unchanged
+
+    def fetch_parsed(self, url: str, parse):
+        """Fetch a url and parse it, reusing the stored parse when the page is unchanged."""
+        page, unchanged = self.fetch_page(url)
+        if unchanged and page.parsed_by == self.get_parser_name(parse):
+            return page.parsed_data
+        parsed_data = parse(bytes(page.content))
+        self.store_parsed_data(page, parse, parsed_data)
+        return parsed_data
 
+    def get_cached_page(self, url: str) -> PageCache | None:
+        return PageCache.objects.filter(url=url).first()
+
+    @staticmethod
+    def is_cache_miss(status: int, cached_page: PageCache | None) -> bool:
+        """Whether a response is a 304 Not Modified that no cached page can answer."""
+        return status == 304 and cached_page is None
+
+    def get_conditional_headers(self, page: PageCache | None) -> dict:
+        """Build If-None-Match / If-Modified-Since headers from a cached page."""
+        headers = {}
+        if page is None:
+            return headers
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def store_page(self, url: str, headers, content: bytes, cached_page=None) -> tuple[PageCache, bool]:
+        """
+        Store a freshly downloaded body with its validators.
+
+        Returns the page and whether its body hashes the same as the cached one, in
+        which case the stored parse is kept; otherwise the stale parse is dropped.
+        """
+        content_hash = get_content_hash(content)
+        if cached_page is not None and cached_page.content_hash == content_hash:
+            cached_page.etag = headers.get("ETag")
+            cached_page.last_modified = headers.get("Last-Modified")
+            cached_page.save(update_fields=["etag", "last_modified", "updated_at"])
+            return cached_page, True
+
+        page, _ = PageCache.objects.update_or_create(
+            url=url,
+            defaults={
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "content": content,
+                "content_hash": content_hash,
+                "parsed_by": None,
+                "parsed_data": None,
+            },
+        )
+        return page, False
 
-class VikingsShowRawDataService:
+    def store_raw_data(self, raw_model, data) -> bool:
+        """
+        Store a scraped payload as a new raw snapshot unless it matches the latest one.
+
+        Returns whether a snapshot was written, i.e. whether the source changed.
+        """
+        content_hash = get_content_hash(json.dumps(data, sort_keys=True).encode())
+        latest_snapshot = raw_model.objects.order_by("-created_at").only("content_hash").first()
+        if latest_snapshot is not None and latest_snapshot.content_hash == content_hash:
+            return False
+        raw_model.objects.create(data=data, content_hash=content_hash)
+        return True
+
+    def store_parsed_data(self, page: PageCache, parse, parsed_data):
+        page.parsed_by = self.get_parser_name(parse)
+        page.parsed_data = parsed_data
+        page.save(update_fields=["parsed_by", "parsed_data", "updated_at"])
+
+    def get_parser_name(self, parse) -> str:
+        """Identify a parse callable, so a stored parse is only reused by the same parser."""
+        return f"{parse.__module__}.{parse.__qualname__}:v{PARSER_VERSION}"
+
+    @staticmethod
+    def soupify(html_content, parse_only=None) -> BeautifulSoup:
+        """Parse html, building only the regions matched by `parse_only` when it is given."""
+        return BeautifulSoup(html_content, get_html_parser(), parse_only=parse_only)
+
+
+class RawDataService:
+    """
+    Scrape a source into a new raw snapshot.
+
+    A scrape fetches the source's index page, then one detail page per entry,
+    and assembles both into the snapshot. `handle` runs every step in this
+    process on the fetch engine; etl.tasks.scrape_source runs the same steps
+    with one Celery task per detail page instead.
+    """
+
+    source = None
+    raw_model = None
+    index_url = None
+    task_name = None
 
     def __init__(self):
         self.scrape_service = ScrapeService()
 
+    def get_max_workers(self) -> int:
+        return settings.SCRAPING_MAX_WORKERS
+
     def handle(self):
+        """Scrape the source and return whether a new snapshot was stored."""
         start_time = time.time()
         try:
-            content = self.scrape_service.fetch(VIKINGS_SHOW_CAST_URL)
-            soup = self.scrape_service.soupify(content)
-            parsed_data = self.parse_data(soup)
-            RawVikingsShow.objects.create(data=parsed_data)
-            execution_time = time.time() - start_time
-            self.scrape_service.log_scraping_task(
-                task_name="Scrape Vikings Show Data",
-                status="success",
-                execution_time=execution_time,
-                source=VIKINGS_SHOW_CAST_URL
-            )
+            index_data = self.fetch_index()
+            urls = self.get_detail_urls(index_data)
+            details = []
+            if urls:
+                fetch_engine = get_fetch_engine(self.scrape_service, max_workers=self.get_max_workers())
+                details = fetch_engine.fetch_all(urls, self.parse_detail_page)
+            changed = self.store(self.assemble(index_data, details))
+            self.log_scrape("success", start_time)
+            return changed
         except Exception as e:
-            execution_time = time.time() - start_time
-            self.scrape_service.log_scraping_task(
-                task_name="Scrape Vikings Show Data",
-                status="failure",
-                execution_time=execution_time,
-                error_message=str(e),
-                source=VIKINGS_SHOW_CAST_URL
-            )
+            self.log_scrape("failure", start_time, error_message=str(e))
             raise
+        finally:
+            self.scrape_service.flush_logs()
+
+    def fetch_index(self):
+        """Fetch and parse the index page."""
+        return self.scrape_service.fetch_parsed(self.index_url, self.parse_index_page)
+
+    def get_detail_urls(self, index_data) -> list:
+        """Return the detail pages to fetch for the parsed index page."""
+        return []
+
+    def fetch_detail(self, url: str):
+        """Fetch and parse a single detail page."""
+        return self.scrape_service.fetch_parsed(url, self.parse_detail_page)
+
+    def assemble(self, index_data, details):
+        """
+        Combine the index page with its detail pages, given in the order of
+        `get_detail_urls`. A detail page that failed is passed as its exception.
+        """
+        return index_data
+
+    def store(self, data) -> bool:
+        """Store the snapshot unless it matches the latest one and return whether it was stored."""
+        return self.scrape_service.store_raw_data(self.raw_model, data)
+
+    def log_scrape(self, status, start_time, error_message=None):
+        self.scrape_service.log_scraping_task(
+            task_name=self.task_name,
+            status=status,
+            execution_time=time.time() - start_time,
+            error_message=error_message,
+            source=self.index_url,
+        )
 
-    def parse_data(self, soup):
-        cast_data = VikingsShowParser(soup).parse_cast_page()
-        
+    @staticmethod
+    def parse_index_page(content):
+        raise NotImplementedError
+
+    @staticmethod
+    def parse_detail_page(content):
+        raise NotImplementedError
+
+
+class VikingsShowRawDataService(RawDataService):
+
+    source = "vikings_show"
+    raw_model = RawVikingsShow
+    index_url = VIKINGS_SHOW_CAST_URL
+    task_name = "Scrape Vikings Show Data"
+
+    def get_max_workers(self) -> int:
+        return settings.SCRAPING_VIKINGS_SHOW_WORKERS
+
+    @staticmethod
+    def parse_index_page(content):
+        soup = ScrapeService.soupify(content, parse_only=VikingsShowParser.CAST_PAGE_REGIONS)
+        return VikingsShowParser(soup).parse_cast_page()
+
+    def get_linked_cast(self, cast_data) -> list:
+        return [cast for cast in cast_data or [] if cast.get("href")]
+
+    def get_detail_urls(self, cast_data) -> list:
+        return [f"{VIKINGS_SHOW_BASE_URL}{cast['href']}" for cast in self.get_linked_cast(cast_data)]
+
+    def assemble(self, cast_data, character_pages):
         if not cast_data: 
             print("No cast data found.")
             return None
-        
-        for cast in cast_data:
-            href = cast.get("href")
-            if not href:
-                continue
-            try:
-                character_page_html = self.scrape_service.fetch(f"{VIKINGS_SHOW_BASE_URL}{href}")
-                character_page_soup = self.scrape_service.soupify(character_page_html)
-                character_name, actor_name, character_description = VikingsShowParser(
-                    character_page_soup
-                ).parse_character_page()
-                cast.update(
-                    {
-                        "character_name": character_name,
-                        "actor_name": actor_name,
-                        "character_description": character_description,
-                    }
-                )
-            except Exception as e:
+
+        for cast, character_page in zip(self.get_linked_cast(cast_data), character_pages):
+            if isinstance(character_page, Exception):
                 self.scrape_service.log_scraping_task(
-                    task_name=f"Parse Character Page: {href}",
+                    task_name=f"Parse Character Page: {cast['href']}",
                     status="failure",
                     execution_time=0,
-                    error_message=str(e),
-                    source=f"{VIKINGS_SHOW_BASE_URL}{href}"
+                    error_message=str(character_page),
+                    source=f"{VIKINGS_SHOW_BASE_URL}{cast['href']}"
                 )
+                continue
+            cast.update(character_page)
         return cast_data
 
+    @staticmethod
+    def parse_detail_page(content):
+        character_page_soup = ScrapeService.soupify(
+            content, parse_only=VikingsShowParser.CHARACTER_PAGE_REGIONS
+        )
+        character_name, actor_name, character_description = VikingsShowParser(
+            character_page_soup
+        ).parse_character_page()
+        return {
+            "character_name": character_name,
+            "actor_name": actor_name,
+            "character_description": character_description,
+        }
 
-class NorsemenShowRawDataService:
 
-    def __init__(self):
-        self.scrape_service = ScrapeService()
+class NorsemenShowRawDataService(RawDataService):
+    """The character list on the show's Wikipedia page is the whole scrape; there are no detail pages."""
 
-    def handle(self):
-        start_time = time.time()
-        try:
-            content = self.scrape_service.fetch(NORSEMEN_SHOW_BASE_URL)
-            soup = self.scrape_service.soupify(content)
-            character_list = NorsemenShowParser(soup).parse_character_list()
-            RawNorsemenShow.objects.create(data=character_list)
-            execution_time = time.time() - start_time
-            self.scrape_service.log_scraping_task(
-                task_name="Scrape Norsemen Show Data",
-                status="success",
-                execution_time=execution_time,
-                source=NORSEMEN_SHOW_BASE_URL
-            )
-        except Exception as e:
-            execution_time = time.time() - start_time
-            self.scrape_service.log_scraping_task(
-                task_name="Scrape Norsemen Show Data",
-                status="failure",
-                execution_time=execution_time,
-                error_message=str(e),
-                source=NORSEMEN_SHOW_BASE_URL
-            )
-            raise
+    source = "norsemen_show"
+    raw_model = RawNorsemenShow
+    index_url = NORSEMEN_SHOW_BASE_URL
+    task_name = "Scrape Norsemen Show Data"
 
+    @staticmethod
+    def parse_index_page(content):
+        soup = ScrapeService.soupify(content, parse_only=NorsemenShowParser.CHARACTER_LIST_REGIONS)
+        return NorsemenShowParser(soup).parse_character_list()
 
-class NFLRawDataService:
 
-    def __init__(self):
-        self.scrape_service = ScrapeService()
+class NFLRawDataService(RawDataService):
 
-    def handle(self):
-        start_time = time.time()
-        try:
-            content = self.scrape_service.fetch(NFL_ROSTER_URL)
-            soup = self.scrape_service.soupify(content)
-            players = NFLParser(soup).parse_players_table()
+    source = "vikings_nfl"
+    raw_model = RawVikingsNFL
+    index_url = NFL_ROSTER_URL
+    task_name = "Scrape Vikings NFL Data"
 
-            with ThreadPoolExecutor(max_workers=8) as executor:
-                players = list(executor.map(self.fetch_player_details, players))
+    @staticmethod
+    def parse_index_page(content):
+        soup = ScrapeService.soupify(content, parse_only=NFLParser.PLAYERS_TABLE_REGIONS)
+        return NFLParser(soup).parse_players_table()
 
-            RawVikingsNFL.objects.create(data=players)
-            execution_time = time.time() - start_time
-            self.scrape_service.log_scraping_task(
-                task_name="Scrape Vikings NFL Data",
-                status="success",
-                execution_time=execution_time,
-                source=NFL_ROSTER_URL
-            )
-        except Exception as e:
-            execution_time = time.time() - start_time
-            self.scrape_service.log_scraping_task(
-                task_name="Scrape Vikings NFL Data",
-                status="failure",
-                execution_time=execution_time,
-                error_message=str(e),
-                source=NFL_ROSTER_URL
-            )
-            raise
+    def get_detail_urls(self, players) -> list:
+        return [player["profile_link"] for player in players]
 
-    def fetch_player_details(self, player):
-        try:
-            player_content = self.scrape_service.fetch(player["profile_link"])
-            soup = self.scrape_service.soupify(player_content)
-            player_details = NFLParser(soup).parse_player_details()
-            player["details"] = player_details
-            return player
-        except Exception as e:
+    def assemble(self, players, player_details):
+        return list(map(self.attach_player_details, players, player_details))
+
+    @staticmethod
+    def parse_detail_page(content):
+        soup = ScrapeService.soupify(content, parse_only=NFLParser.PLAYER_DETAILS_REGIONS)
+        return NFLParser(soup).parse_player_details()
+
+    def attach_player_details(self, player, player_details):
+        if isinstance(player_details, Exception):
             self.scrape_service.log_scraping_task(
                 task_name=f"Fetch Player Details: {player['profile_link']}",
                 status="failure",
                 execution_time=0,
-                error_message=str(e),
+                error_message=str(player_details),
                 source=player["profile_link"]
             )
-            return player
\ No newline at end of file
+            return player
+        player["details"] = player_details
+        return player
+
+
+RAW_DATA_SERVICES = {
+    service.source: service
+    for service in (VikingsShowRawDataService, NorsemenShowRawDataService, NFLRawDataService)
+}
@@ -0,0 +1,92 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool:
+    """Keep-alive HTTP sessions shared across scrapes, one per host."""
+
+    def __init__(self, pool_maxsize, timeout, host_config=None, headers=None):
+        """
+        Initialize the pool.
+
+        `timeout` is a (connect, read) tuple and `host_config` maps a host name to
+        overrides for `pool_maxsize`, `timeout` and `headers`.
+        """
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.host_config = host_config or {}
+        self.headers = headers or {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, url: str) -> requests.Session:
+        """Return the session for the url's host, creating it on first use."""
+        host = urlsplit(url).netloc
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._sessions[host] = self.build_session(host)
+        return session
+
+    def build_session(self, host: str) -> requests.Session:
+        """Create a session with a bounded connection pool for a single host."""
+        config = self.host_config.get(host, {})
+        pool_maxsize = config.get("pool_maxsize", self.pool_maxsize)
+
+        session = requests.Session()
+        session.headers.update(self.get_headers(host))
+        # One host per session, so a single pool of `pool_maxsize` connections is
+        # enough; `pool_block` caps it instead of opening throwaway connections.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, pool_block=True)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get_headers(self, host: str) -> dict:
+        """Return the default headers merged with the host's own headers."""
+        return {**self.headers, **self.host_config.get(host, {}).get("headers", {})}
+
+    def get_timeout(self, url: str) -> tuple[float, float]:
+        """Return the (connect, read) timeout configured for the url's host."""
+        host = urlsplit(url).netloc
+        return tuple(self.host_config.get(host, {}).get("timeout", self.timeout))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Issue a GET through the host's session with its configured timeout."""
+        kwargs.setdefault("timeout", self.get_timeout(url))
+        return self.get_session(url).get(url, **kwargs)
+
+    def close(self):
+        """Close every session and drop its pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """Return the process-wide session pool built from the scraping settings."""
+    global _session_pool
+    if _session_pool is None:
+        with _session_pool_lock:
+            if _session_pool is None:
+                _session_pool = SessionPool(
+                    pool_maxsize=settings.SCRAPING_POOL_MAXSIZE,
+                    timeout=(
+                        settings.SCRAPING_CONNECT_TIMEOUT,
+                        settings.SCRAPING_READ_TIMEOUT,
+                    ),
+                    host_config=settings.SCRAPING_HOST_CONFIG,
+                    headers=settings.SCRAPING_DEFAULT_HEADERS,
+                )
+    return _session_pool
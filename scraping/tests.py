@@ -1,3 +1,555 @@
-from django.test import TestCase
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import requests
+from aiohttp import web
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+from celery.signals import worker_process_shutdown
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+
+from etl.models import PageCache, RawVikingsNFL, RawVikingsShow, ScrapingLog, ScrapingLogRollup
+from etl.services import MetricsService
+from scraping.engines import AsyncFetchEngine, PipelineFetchEngine, ThreadedFetchEngine, get_fetch_engine
+from scraping.log_buffer import ScrapingLogBuffer
+from scraping.parsers import NFLParser, NorsemenShowParser, VikingsShowParser, get_html_parser
+from scraping.sessions import SessionPool, get_session_pool
+from scraping.services import (
+    NFL_ROSTER_URL,
+    VIKINGS_SHOW_CAST_URL,
+    NFLRawDataService,
+    NorsemenShowRawDataService,
+    ScrapeService,
+    VikingsShowRawDataService,
+)
+
+HTML_PARSERS = ["lxml", "html.parser"]
+
+
+def page_shell(content):
+    """Wrap a parsed region in navigation and footer markup the parsers must skip."""
+    navigation = "".join(
+        f"<li><a href='/section/{index}' title='Section {index}'>Section {index}</a></li>" for index in range(5)
+    )
+    return (
+        f"<html><head><title>Page</title></head><body><nav><ul>{navigation}</ul></nav>{content}"
+        "<footer><p><strong>Footer:</strong> links</p></footer></body></html>"
+    )
+
+
+def vikings_cast_page(character_slugs):
+    items = "".join(
+        f"<li><a href='/shows/vikings/cast/{slug}'><div class='img-container'>"
+        f"<img src='https://www.history.com/images/{slug}.jpg'></div><strong>{slug}</strong></a></li>"
+        for slug in character_slugs
+    )
+    return page_shell(f"<div class='tile-list tile-boxed'><ul>{items}</ul></div>")
+
+
+def vikings_character_page(character_name="Ragnar Lothbrok", actor_name="Travis Fimmel"):
+    return page_shell(
+        f"<header class='section-title'><h1><strong>{character_name}</strong>"
+        f"<small>Played by {actor_name}</small></h1></header>"
+        f"<article class='main-article'><p>{character_name} raids the coasts of England.</p><p>More.</p></article>"
+    )
+
+
+def norsemen_page():
+    return page_shell(
+        "<div class='mw-content-ltr mw-parser-output'>"
+        "<table class='infobox'><tr><td><ul><li>Genre</li></ul></td></tr></table>"
+        "<ul><li><a href='/wiki/Orm' title='Orm'>Nils Jorgen Kaalstad</a> as Orm, a chieftain's brother.</li></ul>"
+        "</div>"
+    )
+
+
+def nfl_roster_page(count):
+    rows = "".join(
+        f"<tr><td><img class='img-responsive' src='https://static.www.nfl.com/player-{index}.png'>"
+        f"<span class='nfl-o-roster__player-name'><a href='/team/players-roster/player-{index}/'>Player {index}</a>"
+        "</span></td></tr>"
+        for index in range(count)
+    )
+    return page_shell(f"<table><tbody>{rows}</tbody></table>")
+
+
+def nfl_player_page(age):
+    return page_shell(
+        "<div class='nfl-t-person-tile__stat-details d3-o-list'>"
+        f"<p><strong>Age:</strong> {age}</p><p><strong>College:</strong> LSU</p></div>"
+        "<table summary='Career Stats'><thead><tr><th>SEASON</th><th>TEAM</th><th>G</th></tr></thead>"
+        "<tbody><tr><td>2023</td><td>MIN</td><td>10</td></tr></tbody></table>"
+        "<div class='d3-l-grid--inner nfl-c-biography'><p>Drafted in the first round.</p></div>"
+    )
+
+
+PAGE_PARSERS = {
+    "vikings_cast": (VikingsShowParser.CAST_PAGE_REGIONS, lambda soup: VikingsShowParser(soup).parse_cast_page()),
+    "vikings_character": (
+        VikingsShowParser.CHARACTER_PAGE_REGIONS,
+        lambda soup: VikingsShowParser(soup).parse_character_page(),
+    ),
+    "norsemen": (
+        NorsemenShowParser.CHARACTER_LIST_REGIONS,
+        lambda soup: NorsemenShowParser(soup).parse_character_list(),
+    ),
+    "nfl_roster": (NFLParser.PLAYERS_TABLE_REGIONS, lambda soup: NFLParser(soup).parse_players_table()),
+    "nfl_player": (NFLParser.PLAYER_DETAILS_REGIONS, lambda soup: NFLParser(soup).parse_player_details()),
+}
+
+PAGES = {
+    "vikings_cast": lambda: vikings_cast_page(["ragnar-lothbrok", "lagertha"]),
+    "vikings_character": vikings_character_page,
+    "norsemen": norsemen_page,
+    "nfl_roster": lambda: nfl_roster_page(2),
+    "nfl_player": lambda: nfl_player_page(age=25),
+}
+
+
+class RegionParsingTests(SimpleTestCase):
+    """Parsing only the regions a parser declares must give the same output as parsing the whole page."""
+
+    def assert_same_output(self, page, content):
+        regions, parse = PAGE_PARSERS[page]
+        for backend in HTML_PARSERS:
+            with self.subTest(page=page, backend=backend):
+                full_output = parse(BeautifulSoup(content, backend))
+                self.assertEqual(parse(BeautifulSoup(content, backend, parse_only=regions)), full_output)
+        return full_output
+
+    def test_pages(self):
+        for page, build in PAGES.items():
+            self.assertTrue(self.assert_same_output(page, build().encode()))
+
+    def test_regions_match_a_class_among_others(self):
+        details = self.assert_same_output("nfl_player", nfl_player_page(age=25).encode())
+        self.assertEqual(details["Age"], "25")
+
+        content = (
+            vikings_character_page()
+            .replace("class='section-title'", "class='section-title section-title--hero'")
+            .replace("class='main-article'", "class='article main-article'")
+        )
+        character_name, actor_name, description = self.assert_same_output("vikings_character", content.encode())
+        self.assertEqual((character_name, actor_name), ("Ragnar Lothbrok", "Travis Fimmel"))
+        self.assertTrue(description)
+
+    def test_regions_match_classes_in_any_order(self):
+        content = nfl_player_page(age=25).replace(
+            "class='d3-l-grid--inner nfl-c-biography'", "class='nfl-c-biography d3-l-grid--inner'"
+        )
+        regions, _ = PAGE_PARSERS["nfl_player"]
+        soup = BeautifulSoup(content, "lxml", parse_only=regions)
+        self.assertIsNotNone(soup.find("div", class_="nfl-c-biography"))
+
+
+class HtmlParserTests(SimpleTestCase):
+    """The SCRAPING_HTML_PARSER backend and its fallback."""
+
+    def setUp(self):
+        # The backend is looked up once per process.
+        get_html_parser.cache_clear()
+        self.addCleanup(get_html_parser.cache_clear)
+
+    @override_settings(SCRAPING_HTML_PARSER="lxml")
+    def test_lxml_is_used_when_installed(self):
+        self.assertEqual(get_html_parser(), "lxml")
+        self.assertEqual(ScrapeService.soupify(b"<p>Skol</p>").builder.NAME, "lxml")
+
+    @override_settings(SCRAPING_HTML_PARSER="lxml")
+    def test_falls_back_to_html_parser_when_lxml_is_missing(self):
+        lookup = builder_registry.lookup
+        with mock.patch(
+            "scraping.parsers.builder_registry.lookup",
+            side_effect=lambda *features: None if "lxml" in features else lookup(*features),
+        ):
+            self.assertEqual(get_html_parser(), "html.parser")
+            soup = ScrapeService.soupify(b"<p>Skol</p>")
+        self.assertEqual(soup.builder.NAME, "html.parser")
+        self.assertEqual(soup.p.get_text(), "Skol")
+
+
+def parse_length(content):
+    return len(content)
+
+
+def exit_parser(content):
+    # Kills the parser process, as an out-of-memory kill or a crash in lxml would.
+    os._exit(1)
+
+
+class StubPage:
+    def __init__(self, content):
+        self.content = content
+        self.parsed_by = None
+
+
+class StubScrapeService:
+    """Serves every url from memory; `store_parsed_data` fails for the urls in `failing_stores`."""
+
+    def __init__(self, failing_stores=()):
+        self.failing_stores = set(failing_stores)
+
+    def fetch_page(self, url):
+        return StubPage(url.encode()), False
+
+    def get_parser_name(self, parse):
+        return parse.__qualname__
+
+    def store_parsed_data(self, page, parse, parsed_data):
+        if page.content.decode() in self.failing_stores:
+            raise Exception(f"Could not store {page.content.decode()}")
+
+
+class PipelineFetchEngineTests(SimpleTestCase):
+    """The fetch threads and parser processes of the pipeline engine."""
+
+    URLS = [f"https://www.vikings.com/team/players-roster/player-{index}/" for index in range(40)]
+
+    def fetch_all(self, scrape_service, parse):
+        engine = PipelineFetchEngine(scrape_service, max_workers=4, parse_workers=1, queue_size=1)
+        results = []
+        fetching = threading.Thread(target=lambda: results.extend(engine.fetch_all(self.URLS, parse)), daemon=True)
+        fetching.start()
+        fetching.join(timeout=60)
+        self.assertFalse(fetching.is_alive(), "fetch_all did not return")
+        return results
+
+    def test_parses_every_page_in_order(self):
+        self.assertEqual(self.fetch_all(StubScrapeService(), parse_length), [len(url) for url in self.URLS])
+
+    def test_dead_parser_process_fails_the_pages_instead_of_hanging(self):
+        results = self.fetch_all(StubScrapeService(), exit_parser)
+        self.assertEqual(len(results), len(self.URLS))
+        self.assertTrue(all(isinstance(result, BrokenProcessPool) for result in results))
+
+    def test_store_failure_fails_only_its_page(self):
+        results = self.fetch_all(StubScrapeService(failing_stores=[self.URLS[3]]), parse_length)
+        self.assertIsInstance(results[3], Exception)
+        self.assertEqual(results[:3] + results[4:], [len(url) for url in self.URLS[:3] + self.URLS[4:]])
+
+
+@override_settings(SCRAPING_ENGINE="pipeline", SCRAPING_MAX_WORKERS=2, SCRAPING_PARSE_WORKERS=2)
+class PipelineScrapeTests(TransactionTestCase):
+    """A seed.py scrape on the pipeline engine, from the roster page to the stored snapshot."""
+
+    # The fetch threads write the page cache through their own connections.
+    @skipUnlessDBFeature("test_db_allows_multiple_connections")
+    def test_player_pages_are_parsed_in_parser_processes(self):
+        pages = {NFL_ROSTER_URL: nfl_roster_page(3)}
+        for index in range(3):
+            pages[f"https://www.vikings.com/team/players-roster/player-{index}/"] = nfl_player_page(age=20 + index)
+        service = NFLRawDataService()
+        with (
+            mock.patch.object(
+                service.scrape_service.session_pool,
+                "get",
+                side_effect=lambda url, **kwargs: get_response(content=pages[url].encode()),
+            ),
+            mock.patch("scraping.engines.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as parse_pool,
+        ):
+            self.assertTrue(service.handle())
+
+        parse_pool.assert_called_once()
+        players = RawVikingsNFL.objects.get().data
+        self.assertEqual(
+            [(player["player_name"], player["details"]["Age"]) for player in players],
+            [("Player 0", "20"), ("Player 1", "21"), ("Player 2", "22")],
+        )
+        self.assertEqual(players[0]["details"]["career_stats"]["latest_season"]["TEAM"], "MIN")
+        parser_name = service.scrape_service.get_parser_name(NFLRawDataService.parse_detail_page)
+        self.assertEqual(PageCache.objects.filter(parsed_by=parser_name).count(), 3)
+        self.assertEqual(ScrapingLog.objects.filter(status="success").count(), 5)
+
+    def test_daemonic_processes_fetch_on_threads(self):
+        with mock.patch("scraping.engines.multiprocessing.current_process") as current_process:
+            current_process.return_value.daemon = True
+            with self.assertLogs("scraping.engines", "WARNING"):
+                engine = get_fetch_engine(ScrapeService(), max_workers=2)
+        self.assertIsInstance(engine, ThreadedFetchEngine)
+
+
+@override_settings(SCRAPING_ENGINE="threads", SCRAPING_VIKINGS_SHOW_WORKERS=3)
+class VikingsCharacterFetchTests(TransactionTestCase):
+    """The Vikings character pages are fetched on a thread pool of SCRAPING_VIKINGS_SHOW_WORKERS."""
+
+    # The fetch threads write the page cache through their own connections.
+    @skipUnlessDBFeature("test_db_allows_multiple_connections")
+    def test_character_pages_are_fetched_concurrently(self):
+        characters = {"ragnar-lothbrok": "Ragnar Lothbrok", "lagertha": "Lagertha", "rollo": "Rollo"}
+        # Each character page waits until all three are being fetched at once.
+        all_fetching = threading.Barrier(len(characters), timeout=10)
+
+        def get(url, **kwargs):
+            if url == VIKINGS_SHOW_CAST_URL:
+                return get_response(content=vikings_cast_page(characters).encode())
+            all_fetching.wait()
+            return get_response(content=vikings_character_page(characters[url.rsplit("/", 1)[1]]).encode())
+
+        service = VikingsShowRawDataService()
+        with mock.patch.object(service.scrape_service.session_pool, "get", side_effect=get):
+            self.assertTrue(service.handle())
+
+        cast = RawVikingsShow.objects.get().data
+        self.assertEqual([member["character_name"] for member in cast], list(characters.values()))
+        self.assertEqual(cast[1]["href"], "/shows/vikings/cast/lagertha")
+        self.assertFalse(ScrapingLog.objects.filter(status="failure").exists())
+
+
+class ScrapingLogBufferTests(TestCase):
+    """Buffered ScrapingLog writes and their metrics rollups."""
+
+    def add(self, log_buffer, count=1, status="success"):
+        for _ in range(count):
+            log_buffer.add(task_name="Fetch URL: https://www.vikings.com/", status=status, execution_time=0.5)
+
+    def test_flushes_once_max_size_entries_are_buffered(self):
+        log_buffer = ScrapingLogBuffer(max_size=3, max_age=60)
+        self.add(log_buffer, 2)
+        self.assertEqual(ScrapingLog.objects.count(), 0)
+        self.add(log_buffer)
+        self.assertEqual(ScrapingLog.objects.count(), 3)
+        self.assertEqual(ScrapingLogRollup.objects.get().total, 3)
+
+    def test_flushes_once_the_oldest_entry_is_max_age_old(self):
+        log_buffer = ScrapingLogBuffer(max_size=100, max_age=5)
+        with mock.patch("scraping.log_buffer.time.monotonic", return_value=100.0) as monotonic:
+            self.add(log_buffer, 2)
+            monotonic.return_value = 104.0
+            self.add(log_buffer)
+            self.assertEqual(ScrapingLog.objects.count(), 0)
+            monotonic.return_value = 105.0
+            self.add(log_buffer)
+        self.assertEqual(ScrapingLog.objects.count(), 4)
+
+    def test_live_buffers_are_flushed_when_the_worker_process_exits(self):
+        log_buffer = ScrapingLogBuffer(max_size=100, max_age=60)
+        self.add(log_buffer)
+        self.assertEqual(ScrapingLog.objects.count(), 0)
+        worker_process_shutdown.send(sender=None, pid=os.getpid(), exitcode=0)
+        self.assertEqual(ScrapingLog.objects.count(), 1)
+
+    def test_scrape_flushes_its_logs_when_it_fails(self):
+        with mock.patch.object(ScrapeService, "fetch_parsed", side_effect=ValueError("Error fetching the list")):
+            with self.assertRaisesMessage(ValueError, "Error fetching the list"):
+                NorsemenShowRawDataService().handle()
+        log = ScrapingLog.objects.get()
+        self.assertEqual((log.task_name, log.status), ("Scrape Norsemen Show Data", "failure"))
+
+    def test_failed_rollup_update_keeps_the_logs_and_the_scrape_error(self):
+        with mock.patch.object(ScrapeService, "fetch_parsed", side_effect=ValueError("Error fetching the list")):
+            with mock.patch.object(MetricsService, "record_logs", side_effect=RuntimeError("Rollups are locked")):
+                with self.assertLogs("scraping.log_buffer", "ERROR"), self.assertRaises(ValueError):
+                    NorsemenShowRawDataService().handle()
+        self.assertEqual(ScrapingLog.objects.count(), 1)
+        self.assertFalse(ScrapingLogRollup.objects.exists())
+
+    def test_failed_write_is_logged_not_raised(self):
+        log_buffer = ScrapingLogBuffer(max_size=100, max_age=60)
+        self.add(log_buffer, 2)
+        with mock.patch.object(ScrapingLog.objects, "bulk_create", side_effect=RuntimeError("Database is down")):
+            with self.assertLogs("scraping.log_buffer", "ERROR") as logs:
+                log_buffer.flush()
+        self.assertIn("Could not write 2 scraping logs", logs.output[0])
+        # The entries are dropped rather than written twice by the next flush.
+        log_buffer.flush()
+        self.assertEqual(ScrapingLog.objects.count(), 0)
+
+
+def get_response(status=200, content=b"", **headers):
+    response = requests.Response()
+    response.status_code = status
+    response._content = content
+    response.headers.update(headers)
+    return response
+
+
+class ConditionalFetchTests(TestCase):
+    """Conditional GETs against the page cache and how they are logged."""
+
+    URL = "https://www.vikings.com/team/players-roster/"
+    VALIDATORS = {"ETag": '"v1"', "Last-Modified": "Sat, 17 Oct 2026 00:00:00 GMT"}
+
+    def setUp(self):
+        self.scrape_service = ScrapeService()
+
+    def fetch_page(self, *responses):
+        with mock.patch.object(self.scrape_service.session_pool, "get", side_effect=responses) as get:
+            page, unchanged = self.scrape_service.fetch_page(self.URL)
+        self.scrape_service.flush_logs()
+        return page, unchanged, get
+
+    def get_log(self):
+        return ScrapingLog.objects.order_by("-id").values("status", "cache_hit", "response_size").first()
+
+    def test_revalidates_with_the_cached_validators(self):
+        page, unchanged, get = self.fetch_page(get_response(content=b"<html>Roster</html>", **self.VALIDATORS))
+        self.assertFalse(unchanged)
+        get.assert_called_once_with(self.URL, headers={})
+        self.assertEqual(self.get_log(), {"status": "success", "cache_hit": False, "response_size": 19})
+
+        page, unchanged, get = self.fetch_page(get_response(304))
+        self.assertTrue(unchanged)
+        self.assertEqual(bytes(page.content), b"<html>Roster</html>")
+        get.assert_called_once_with(
+            self.URL,
+            headers={"If-None-Match": '"v1"', "If-Modified-Since": "Sat, 17 Oct 2026 00:00:00 GMT"},
+        )
+        self.assertEqual(self.get_log(), {"status": "success", "cache_hit": True, "response_size": 19})
+
+    def test_same_body_is_unchanged_but_not_a_cache_hit(self):
+        self.fetch_page(get_response(content=b"<html>Roster</html>", **self.VALIDATORS))
+        page, unchanged, _ = self.fetch_page(get_response(content=b"<html>Roster</html>", ETag='"v2"'))
+        self.assertTrue(unchanged)
+        self.assertEqual((page.etag, page.last_modified), ('"v2"', None))
+        self.assertEqual(self.get_log()["cache_hit"], False)
+
+    def test_not_modified_without_a_cached_page_fetches_it_in_full(self):
+        page, unchanged, get = self.fetch_page(get_response(304), get_response(content=b"<html>Roster</html>"))
+        self.assertFalse(unchanged)
+        self.assertEqual(bytes(page.content), b"<html>Roster</html>")
+        self.assertEqual(get.call_args_list, [mock.call(self.URL, headers={}), mock.call(self.URL)])
+        self.assertEqual(self.get_log(), {"status": "success", "cache_hit": False, "response_size": 19})
+
+    def test_repeated_not_modified_without_a_cached_page_fails(self):
+        with self.assertRaisesMessage(Exception, "304 Not Modified with no cached page"):
+            self.fetch_page(get_response(304), get_response(304))
+        self.scrape_service.flush_logs()
+        self.assertEqual(self.get_log()["status"], "failure")
+        self.assertFalse(PageCache.objects.exists())
+
+
+class SessionPoolTests(SimpleTestCase):
+    """Keep-alive sessions shared per host, with per-host pool sizes, timeouts and headers."""
+
+    def setUp(self):
+        self.session_pool = SessionPool(
+            pool_maxsize=4,
+            timeout=(5, 30),
+            host_config={
+                "www.vikings.com": {"pool_maxsize": 8, "timeout": (2, 60), "headers": {"Accept": "text/html"}},
+            },
+            headers={"User-Agent": "tests"},
+        )
+        self.addCleanup(self.session_pool.close)
+
+    def test_sessions_are_reused_per_host(self):
+        session = self.session_pool.get_session("https://www.vikings.com/team/players-roster/")
+        self.assertIs(self.session_pool.get_session("https://www.vikings.com/team/players-roster/player-1/"), session)
+        self.assertIsNot(self.session_pool.get_session("https://www.history.com/shows/vikings/cast"), session)
+
+    def test_adapters_bound_the_connection_pool(self):
+        for url, pool_maxsize in [("https://www.history.com/", 4), ("https://www.vikings.com/", 8)]:
+            with self.subTest(url=url):
+                adapter = self.session_pool.get_session(url).get_adapter(url)
+                self.assertEqual((adapter._pool_connections, adapter._pool_maxsize), (1, pool_maxsize))
+                self.assertTrue(adapter._pool_block)
+
+    def test_host_headers_are_merged_into_the_defaults(self):
+        session = self.session_pool.get_session("https://www.vikings.com/")
+        self.assertEqual(session.headers["User-Agent"], "tests")
+        self.assertEqual(session.headers["Accept"], "text/html")
+        self.assertNotIn("Accept", self.session_pool.get_headers("www.history.com"))
+
+    def test_get_uses_the_host_timeout(self):
+        for url, timeout in [("https://www.history.com/", (5, 30)), ("https://www.vikings.com/", (2, 60))]:
+            with self.subTest(url=url):
+                with mock.patch.object(self.session_pool.get_session(url), "get") as get:
+                    self.session_pool.get(url, headers={"If-None-Match": '"v1"'})
+                get.assert_called_once_with(url, headers={"If-None-Match": '"v1"'}, timeout=timeout)
+
+    @override_settings(SCRAPING_POOL_MAXSIZE=6, SCRAPING_CONNECT_TIMEOUT=3.0, SCRAPING_READ_TIMEOUT=20.0)
+    def test_one_pool_per_process_built_from_the_settings(self):
+        with mock.patch("scraping.sessions._session_pool", None):
+            session_pool = get_session_pool()
+            self.assertIs(get_session_pool(), session_pool)
+        self.assertEqual((session_pool.pool_maxsize, session_pool.timeout), (6, (3.0, 20.0)))
+
+
+class AsyncStubScrapeService(StubScrapeService):
+    """Serves `cached_page` from the page cache and records the fetch logs."""
+
+    get_conditional_headers = ScrapeService.get_conditional_headers
+    is_cache_miss = staticmethod(ScrapeService.is_cache_miss)
+
+    def __init__(self, cached_page=None):
+        super().__init__()
+        self.cached_page = cached_page
+        self.logs = []
+        self.session_pool = SimpleNamespace(
+            host_config={}, get_headers=lambda host: {"User-Agent": "tests"}, get_timeout=lambda url: (5, 5)
+        )
+
+    def get_cached_page(self, url):
+        return self.cached_page
+
+    def store_page(self, url, headers, content, cached_page=None):
+        return StubPage(content), False
+
+    def log_fetch(self, url, status, execution_time, **fields):
+        self.logs.append({"status": status, **fields})
+
+
+class AsyncFetchEngineTests(SimpleTestCase):
+    """Conditional GETs of the asyncio engine, against a local server."""
+
+    def serve(self, *statuses):
+        """Answer GET /page with `statuses` in turn; returns its url and the headers of each request."""
+        statuses, request_headers = list(statuses), []
+
+        async def page(request):
+            request_headers.append(request.headers)
+            status = statuses.pop(0)
+            return web.Response(status=status, body=None if status == 304 else b"<html>Fresh</html>")
+
+        app = web.Application()
+        app.router.add_get("/page", page)
+        runner = web.AppRunner(app)
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        loop.run_until_complete(site.start())
+        serving = threading.Thread(target=loop.run_forever, daemon=True)
+        serving.start()
+
+        def stop():
+            loop.call_soon_threadsafe(loop.stop)
+            serving.join()
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+
+        self.addCleanup(stop)
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/page", request_headers
+
+    def fetch(self, scrape_service, url):
+        engine = AsyncFetchEngine(scrape_service, max_concurrency=2, host_concurrency=2, parse_workers=1)
+        (result,) = engine.fetch_all([url], parse_length)
+        return result
+
+    def test_not_modified_serves_the_cached_page(self):
+        url, request_headers = self.serve(304)
+        cached_page = SimpleNamespace(etag='"v1"', last_modified=None, content=b"<html>Cached</html>", parsed_by=None)
+        scrape_service = AsyncStubScrapeService(cached_page)
+        self.assertEqual(self.fetch(scrape_service, url), len(b"<html>Cached</html>"))
+        self.assertEqual(request_headers[0]["If-None-Match"], '"v1"')
+        self.assertEqual(scrape_service.logs, [{"status": "success", "cache_hit": True, "response_size": 19}])
+
+    def test_not_modified_without_a_cached_page_fetches_it_in_full(self):
+        url, request_headers = self.serve(304, 200)
+        scrape_service = AsyncStubScrapeService()
+        self.assertEqual(self.fetch(scrape_service, url), len(b"<html>Fresh</html>"))
+        self.assertEqual(len(request_headers), 2)
+        self.assertNotIn("If-None-Match", request_headers[1])
+        self.assertEqual(scrape_service.logs, [{"status": "success", "cache_hit": False, "response_size": 18}])
+
+    def test_repeated_not_modified_without_a_cached_page_fails(self):
+        url, _ = self.serve(304, 304)
+        scrape_service = AsyncStubScrapeService()
+        self.assertIn("Not Modified with no cached page", str(self.fetch(scrape_service, url)))
+        self.assertEqual([log["status"] for log in scrape_service.logs], ["failure"])
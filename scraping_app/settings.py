@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_filters",
     "scraping",
     "etl",
@@ -123,6 +124,14 @@ CORS_ALLOW_METHODS = [
 CORS_ALLOW_HEADERS = [
     'content-type',
     'authorization',
+    'if-none-match',
+    'if-modified-since',
+]
+
+# Let the frontend read the validators it sends back in conditional requests.
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'last-modified',
 ]
 
 MIDDLEWARE = [
@@ -182,6 +191,71 @@ django_heroku.settings(locals())
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Scraping settings
+SCRAPING_MAX_WORKERS = int(os.getenv("SCRAPING_MAX_WORKERS", 8))
+SCRAPING_VIKINGS_SHOW_WORKERS = int(os.getenv("SCRAPING_VIKINGS_SHOW_WORKERS", 8))
+SCRAPING_POOL_MAXSIZE = int(
+    os.getenv("SCRAPING_POOL_MAXSIZE", max(SCRAPING_MAX_WORKERS, SCRAPING_VIKINGS_SHOW_WORKERS))
+)
+SCRAPING_CONNECT_TIMEOUT = float(os.getenv("SCRAPING_CONNECT_TIMEOUT", 5))
+SCRAPING_READ_TIMEOUT = float(os.getenv("SCRAPING_READ_TIMEOUT", 30))
+SCRAPING_DEFAULT_HEADERS = {}
+# Per-host overrides of pool_maxsize, timeout, headers and max_concurrency, e.g.
+# {"www.vikings.com": {"pool_maxsize": 8, "timeout": (5, 60), "max_concurrency": 4}}
+SCRAPING_HOST_CONFIG = {}
+# ScrapingLog rows are buffered and bulk inserted once this many are pending or the
+# oldest is this many seconds old, and whenever a scrape ends.
+SCRAPING_LOG_BUFFER_SIZE = int(os.getenv("SCRAPING_LOG_BUFFER_SIZE", 100))
+SCRAPING_LOG_FLUSH_INTERVAL = float(os.getenv("SCRAPING_LOG_FLUSH_INTERVAL", 5))
+# Days to keep ScrapingLog rows per status; 0 keeps them forever. Pruned rows stay
+# counted in the metrics rollups, whose hourly rows older than
+# SCRAPING_LOG_ROLLUP_HOURLY_DAYS are compacted into one row per day.
+SCRAPING_LOG_RETENTION_DAYS = {
+    "success": int(os.getenv("SCRAPING_LOG_RETENTION_SUCCESS_DAYS", 30)),
+    "failure": int(os.getenv("SCRAPING_LOG_RETENTION_FAILURE_DAYS", 90)),
+}
+SCRAPING_LOG_ROLLUP_HOURLY_DAYS = int(os.getenv("SCRAPING_LOG_ROLLUP_HOURLY_DAYS", 31))
+SCRAPING_LOG_PRUNE_CHUNK_SIZE = int(os.getenv("SCRAPING_LOG_PRUNE_CHUNK_SIZE", 5000))
+# Monthly partitions created ahead of time when ScrapingLog is partitioned on PostgreSQL.
+SCRAPING_LOG_PARTITION_MONTHS_AHEAD = int(os.getenv("SCRAPING_LOG_PARTITION_MONTHS_AHEAD", 2))
+# BeautifulSoup backend for scraped pages; falls back to "html.parser" when lxml is missing.
+SCRAPING_HTML_PARSER = os.getenv("SCRAPING_HTML_PARSER", "lxml")
+# "threads" fans page fetches out on a thread pool, "asyncio" on an event loop and
+# "pipeline" fetches on threads while a process pool parses.
+SCRAPING_ENGINE = os.getenv("SCRAPING_ENGINE", "threads")
+SCRAPING_ASYNC_MAX_CONCURRENCY = int(os.getenv("SCRAPING_ASYNC_MAX_CONCURRENCY", 32))
+SCRAPING_ASYNC_HOST_CONCURRENCY = int(os.getenv("SCRAPING_ASYNC_HOST_CONCURRENCY", 8))
+SCRAPING_PARSE_WORKERS = int(os.getenv("SCRAPING_PARSE_WORKERS", os.cpu_count() or 1))
+# Fetched pages allowed to wait for a parser process in the "pipeline" engine.
+SCRAPING_PIPELINE_QUEUE_SIZE = int(os.getenv("SCRAPING_PIPELINE_QUEUE_SIZE", 2 * SCRAPING_PARSE_WORKERS))
+
+# ETL settings
+# Upsert the show tables with batched INSERT ... ON CONFLICT instead of a query pair per row.
+ETL_BULK_UPSERT = os.getenv("ETL_BULK_UPSERT", "true").lower() == "true"
+ETL_BULK_BATCH_SIZE = int(os.getenv("ETL_BULK_BATCH_SIZE", 1000))
+# Raw snapshots fetched per round-trip while streaming them; each one can be several MB.
+ETL_ITERATOR_CHUNK_SIZE = int(os.getenv("ETL_ITERATOR_CHUNK_SIZE", 20))
+
+# API settings
+# Seconds a list or detail response stays cached; 0 disables the response cache.
+# Entries are also invalidated as soon as the ETL reloads their table.
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", 24 * 3600))
+# Largest ?page_size= accepted with ?pagination=cursor.
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 1000))
+# Career stats nested under each /api/vikings_nfl/ player, newest season first.
+API_CAREER_STATS_LIMIT = int(os.getenv("API_CAREER_STATS_LIMIT", 50))
+# Rows fetched per round-trip from the server-side cursor behind the export/ endpoints.
+API_EXPORT_CHUNK_SIZE = int(os.getenv("API_EXPORT_CHUNK_SIZE", 2000))
+
+# Cache settings
+# Same Redis instance as Celery, on its own database.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f'redis://{os.getenv("REDIS_HOST", "redis")}:6379/1',
+    }
+}
+
 # Celery settings
 CELERY_BROKER_URL = f'redis://{os.getenv("REDIS_HOST", "redis")}:6379/2'
 CELERY_ACCEPT_CONTENT = ["application/json"]
@@ -190,6 +264,23 @@ CELERY_RESULT_BACKEND = f'redis://{os.getenv("REDIS_HOST", "redis")}:6379/2'
 CELERY_TIMEZONE = "UTC"
 CELERY_TASK_DEFAULT_RETRY_DELAY = 30
 CELERY_TASK_DEFAULT_MAX_RETRIES = 3
+# The NFL pipeline (the roster, ~90 player profiles and their career stats) runs on
+# its own queue, served by the celery-nfl worker with CELERY_NFL_CONCURRENCY
+# processes, so it never holds up the show scrapes on the default queue.
+CELERY_NFL_QUEUE = os.getenv("CELERY_NFL_QUEUE", "nfl")
+CELERY_TASK_ROUTES = {"etl.tasks.run_vikings_nfl_service": {"queue": CELERY_NFL_QUEUE}}
+# Queue and soft time limits, in seconds, for each scrape source's tasks: the index
+# page, each detail page, and storing the snapshot plus the ETL load. A task is
+# killed CELERY_HARD_TIME_LIMIT_GRACE seconds after its soft limit.
+SCRAPING_TASK_OPTIONS = {
+    "vikings_nfl": {
+        "queue": CELERY_NFL_QUEUE,
+        "index_time_limit": int(os.getenv("CELERY_NFL_INDEX_TIME_LIMIT", 120)),
+        "page_time_limit": int(os.getenv("CELERY_NFL_PAGE_TIME_LIMIT", 60)),
+        "load_time_limit": int(os.getenv("CELERY_NFL_LOAD_TIME_LIMIT", 900)),
+    },
+}
+CELERY_HARD_TIME_LIMIT_GRACE = int(os.getenv("CELERY_HARD_TIME_LIMIT_GRACE", 30))
 
 CELERY_BEAT_SCHEDULE = {
     "run-vikings-show-task-every-24-hours": {
@@ -200,4 +291,13 @@ CELERY_BEAT_SCHEDULE = {
         "task": "etl.tasks.run_norsemen_show_service",
         "schedule": crontab(minute="0", hour="0"),
     },
+    # An hour after the show scrapes, so the heavy NFL pipeline never overlaps them.
+    "run-vikings-nfl-task-every-24-hours": {
+        "task": "etl.tasks.run_vikings_nfl_service",
+        "schedule": crontab(minute="0", hour="1"),
+    },
+    "prune-scraping-logs-every-24-hours": {
+        "task": "etl.tasks.prune_scraping_logs",
+        "schedule": crontab(minute="0", hour="3"),
+    },
 }
@@ -41,9 +41,11 @@ def run_seed():
 
     print("Starting the data seeding process...")
     try:
+        # The ETL runs even when the scrape stored nothing new, so snapshots a
+        # failed load left behind are picked up; the watermark skips the rest.
         VikingsShowRawDataService().handle()
         VikingsShowService().handle()
-        
+
         NorsemenShowRawDataService().handle()
         NorsemenShowService().handle()
 